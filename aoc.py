@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Advent of Code 2021 - shared helpers
+#
+# Solvers return a Result instead of printing their answers; printing is opt-in
+# through report(), so run.py can consume and time the answers without the I/O.
+#
+# The day scripts are run from their own directory, so they put the repo root on
+# sys.path before importing this module:
+#
+#   sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+#   from aoc import Result, report
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Result:
+    """
+        Answer of a part, plus any intermediate values worth showing.
+    """
+    answer: Any
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def __str__(self):
+        return " ".join([f"{k}={v!r}" for k, v in self.details.items()] + [f"answer={self.answer_str()}"])
+
+    def answer_str(self) -> str:
+        # multi-line answers (e.g. the day 13 letters) are shown on their own lines
+        if isinstance(self.answer, str) and "\n" in self.answer:
+            return "\n" + self.answer
+        return repr(self.answer)
+
+
+def report(part: Callable[[str], Result], file: str) -> Result:
+    """
+        Run a part against an input file and print its result.
+    """
+    print(f"\n**** {part.__name__}; {file=}")
+    result = part(file)
+    print(result)
+    return result
+
+
+def chunk_ranges(file: str, chunks: int) -> List[Tuple[int, int]]:
+    """
+        Split a file into at most `chunks` byte ranges of roughly equal size.
+        Every range starts at the beginning of a line and ends after a newline (or at the end of the file).
+    """
+    size = os.path.getsize(file)
+    bounds = [0]
+    with open(file, "rb") as data:
+        for i in range(1, chunks):
+            pos = size * i // chunks
+            if pos <= bounds[-1]:
+                continue
+            # move to the start of the line after the one containing byte pos - 1
+            data.seek(pos - 1)
+            data.readline()
+            bounds.append(min(data.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def read_lines(file: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+        Stream the non-empty raw lines in the byte range [start, end) of a file, without the line endings.
+    """
+    with open(file, "rb") as data:
+        data.seek(start)
+        pos = start
+        while end is None or pos < end:
+            line = data.readline()
+            if not line:
+                break
+            pos += len(line)
+            line = line.rstrip(b"\r\n")
+            if line:
+                yield line
+
+
+def map_chunks(worker: Callable[[str, int, int], Any], file: str, workers: Optional[int] = None, chunks_per_worker: int = 4) -> List[Any]:
+    """
+        Split a file into line-aligned chunks and run worker(file, start, end) on each of them in a
+        process pool (os.cpu_count() processes by default). Returns the results in chunk order.
+
+        The worker has to be a module level function so it can be sent to the other processes, and its
+        module has to be importable under its __name__ for the spawn/forkserver start methods
+        (run.py loads the days as dayNN.dayN for that).
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = chunk_ranges(file, workers * chunks_per_worker)
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(worker, repeat(file), [start for start, _ in ranges], [end for _, end in ranges]))
@@ -2,50 +2,50 @@
 
 # 2021 - advent of code day 1
 # https://adventofcode.com/2021/day/1
+from collections import deque
+from typing import Dict, Iterable, Iterator
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
+def read_depths(file) -> Iterator[int]:
+    """
+        Stream the depth measurements from the file, one line at a time
+    """
+    with open(file) as fp:
+        for line in fp:
+            if line.strip():
+                yield int(line)
+
+def count_increases(depths: Iterable[int], windows: Iterable[int]) -> Dict[int, int]:
+    """
+        Count how many times the sum of each sliding window size is larger than the previous sum,
+        in a single pass and constant memory.
+
+        Two consecutive windows of size k share all but one measurement:
+          a[i+1] + ... + a[i+k] > a[i] + ... + a[i+k-1]  <=>  a[i+k] > a[i]
+        so only the last k measurements need to be kept to compare against.
+    """
+    windows = list(windows)
+    counts = {k: 0 for k in windows}
+    recent = deque(maxlen=max(windows))
+    for depth in depths:
+        for k in windows:
+            if len(recent) >= k and depth > recent[-k]:
+                counts[k] += 1
+        recent.append(depth)
+    return counts
 
 # Part a
-def part_a():
-    with open("input.txt") as fp:
-        Lines = fp.readlines()
-        count = 0
-        last = None
-        for line in Lines:
-            if not last:
-                last = int(line)
-                continue 
-            if int(line) > last:
-                #print(f"{int(line)} > {last}")
-                count += 1
-            last = int(line)
-        return count
+def part_a(file):
+    return Result(count_increases(read_depths(file), [1])[1])
 
 
 # sliding window
-def part_b(): 
-    with open("input.txt") as fp:
-        lines = fp.readlines()
-
-    # calculate sliding window values 
-    sliding_window_values = []
-
-    for num in range(0, len(lines) - 2):
-        
-        sliding_window_values.append(0)
-        val = int(lines[num]) + int(lines[num + 1]) + int(lines[num + 2])
-        # print(f"val= {int(lines[num])} + {int(lines[num+ 1])} + {int(lines[num+ 2])}")
-        # print(f"setting {val=} for {num=}")
-        sliding_window_values[num] = val
-
-    count = 0
-    last = None 
-    for l in sliding_window_values:
-        if not last:
-            last = int(l)
-            continue
-        if int(l) > last:
-            count += 1
-        last = int(l)
-    return count
-
-print(f"Part A: {part_a()}")
-print(f"Part B: {part_b()}")
\ No newline at end of file
+def part_b(file, window=3):
+    return Result(count_increases(read_depths(file), [window])[window])
+
+if __name__ == "__main__":
+    report(part_a, "./input.txt")
+    report(part_b, "./input.txt")
@@ -2,50 +2,94 @@
 
 # 2021 - advent of code day 2
 # https://adventofcode.com/2021/day/2
+import numpy as np
+import numpy.typing as npt
+from typing import Iterable, Iterator, Tuple
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
-def part_a():
-    horiz_pos = depth = 0
+# opcodes for the course commands
+FORWARD, DOWN, UP = 0, 1, 2
+OPCODES = {"forward": FORWARD, "down": DOWN, "up": UP}
 
-    with open("input.txt") as data:
-        lines = data.readlines()
+def parse_course(file) -> Tuple[npt.NDArray, npt.NDArray]:
+    """
+        Parse the whole course file into an array of opcodes and an array of operands
+    """
+    with open(file) as data:
+        words = np.array(data.read().split())
 
-    for line in lines: 
-        (dir, num) = line.replace("\n", "").split(" ")
-        
-        if dir == "forward":
-            horiz_pos += num 
-        elif dir == "down": 
+    names, ops = np.unique(words[0::2], return_inverse=True)
+    unknown = [str(name) for name in names if name not in OPCODES]
+    if unknown:
+        raise ValueError(f"unknown dir: {unknown}")
+    # np.unique numbers the names alphabetically, translate those to the opcodes
+    ops = np.array([OPCODES[name] for name in names], dtype=np.int8)[ops]
+    nums = words[1::2].astype(np.int64)
+    return ops, nums
+
+def stream_course(file) -> Iterator[Tuple[int, int]]:
+    """
+        Stream the (opcode, operand) commands from the file, one line at a time
+    """
+    with open(file) as data:
+        for line in data:
+            if not line.strip():
+                continue
+            (dir, num) = line.split()
+            if dir not in OPCODES:
+                raise ValueError(f"unknown dir: {dir}")
+            yield OPCODES[dir], int(num)
+
+def run_vectorized(ops: npt.NDArray, nums: npt.NDArray) -> Tuple[int, int, int]:
+    """
+        Evaluate the whole course at once with cumulative sums.
+        Returns the horizontal position, the depth with the simple model (part a),
+        and the depth with the aim model (part b).
+    """
+    forward = np.where(ops == FORWARD, nums, 0)
+    # down/up change the depth in the simple model, and the aim in the aim model
+    change = np.where(ops == DOWN, nums, 0) - np.where(ops == UP, nums, 0)
+    aim = np.cumsum(change)
+
+    horiz_pos = int(forward.sum())
+    depth = int(change.sum())
+    aim_depth = int((forward * aim).sum())
+    return horiz_pos, depth, aim_depth
+
+def run_stream(commands: Iterable[Tuple[int, int]]) -> Tuple[int, int, int]:
+    """
+        Same as run_vectorized, one command at a time for input that doesn't fit in memory.
+    """
+    horiz_pos = depth = aim_depth = 0
+    for op, num in commands:
+        if op == FORWARD:
+            horiz_pos += num
+            aim_depth += depth * num
+        elif op == DOWN:
             depth += num
-        elif dir == "up":
-            depth -= num
         else:
-            print(f"unknown dir: {dir}")
-        #print(f"{dir=} {num=}")
+            depth -= num
+    return horiz_pos, depth, aim_depth
+
+def run_course(file, streaming):
+    if streaming:
+        return run_stream(stream_course(file))
+    return run_vectorized(*parse_course(file))
+
+def part_a(file, streaming=False):
+    horiz_pos, depth, _ = run_course(file, streaming)
     res = horiz_pos * depth
-    #print(f"{horiz_pos=} {depth=}, {res=}")
-    return res
+    return Result(res, {"horiz_pos": horiz_pos, "depth": depth})
      
-def part_b():
-    horiz_pos = depth = aim = 0
-
-    with open("input.txt") as data:
-        lines = data.readlines()
-
-    for line in lines: 
-        (dir, num) = line.replace("\n", "").split(" ")
-        
-        if dir == "forward":
-            horiz_pos += num 
-            depth += aim * num
-        elif dir == "down": 
-            aim += num
-        elif dir == "up":
-            aim -= num
-        else:
-            print(f"unknown dir: {dir}")
+def part_b(file, streaming=False):
+    # the depth of the simple model is the aim of this one
+    horiz_pos, aim, depth = run_course(file, streaming)
     res = horiz_pos * depth
-    # print(f"{horiz_pos=} {depth=}, {aim=}, {res=}")
-    return res
+    return Result(res, {"horiz_pos": horiz_pos, "depth": depth, "aim": aim})
 
-print(f"Part A: {part_a()}")
-print(f"Part B: {part_b()}")
\ No newline at end of file
+if __name__ == "__main__":
+    report(part_a, "./input.txt")
+    report(part_b, "./input.txt")
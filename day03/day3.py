@@ -2,112 +2,135 @@
 
 # 2021 - advent of code day 3
 # https://adventofcode.com/2021/day/3
-
-
-def calc_occurences(test_input):
-    bin_length = len(test_input[0])
-    ones = [0] * bin_length
-    zeros = [0] * bin_length
-
-     # Count the number of zeros and ones in each index
-    for input in test_input:
-        for i, v in enumerate(input):
-            if v == '0':
-                zeros[i] += 1
-            else:
-                ones[i] += 1
+import numpy as np
+import numpy.typing as npt
+from typing import List, Tuple
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
+def pack(raw: bytes) -> Tuple[npt.NDArray, int]:
+    """
+        Pack a diagnostic report (one binary number per line) into a uint64 array.
+        Returns the array and the number of bits in each line, which can be at most 64.
+    """
+    raw = raw.strip().replace(b"\r", b"") + b"\n"
+    width = raw.index(b"\n")
+    if width > 64:
+        raise ValueError(f"lines of {width} bits don't fit in uint64")
+    if len(raw) % (width + 1):
+        raise ValueError(f"lines don't all have {width} bits")
+
+    # view the report as a (lines, width + 1) matrix of characters, the last column is the newline
+    bits = np.frombuffer(raw, dtype=np.uint8).reshape(-1, width + 1)[:, :width] - ord("0")
+    if (bits > 1).any():
+        raise ValueError("the report has characters other than 0 and 1")
+
+    values = np.zeros(len(bits), dtype=np.uint64)
+    for i in range(width):
+        values = (values << np.uint64(1)) | bits[:, i].astype(np.uint64)
+    return values, width
+
+
+def parse_input(file):
+    """
+        Read the diagnostic report and return the packed values and the bit width
+    """
+    with open(file, "rb") as data:
+        return pack(data.read())
+
+
+def calc_occurences(values: npt.NDArray, width: int) -> Tuple[List[int], List[int]]:
+    """
+        Count the number of zeros and ones in each bit position (most significant bit first)
+    """
+    ones = [int(((values >> np.uint64(width - 1 - i)) & np.uint64(1)).sum()) for i in range(width)]
+    zeros = [len(values) - n for n in ones]
     return (zeros, ones)
 
 
-def part_a(test_input):
-    zeros, ones = calc_occurences(test_input)
+def power_consumption(values, width):
+    zeros, ones = calc_occurences(values, width)
 
-    gamma_bin = ""
-    epsilon_bin = ""
-    for v in zip(ones,zeros):
-        if v[0] > v[1]:
-            # if total number of ones in this place greater than zero
-            gamma_bin += "1"
-            epsilon_bin += "0"
-        else:
-            gamma_bin += "0"
-            epsilon_bin += "1"
-    # convert binary string to int
-    gamma = int(gamma_bin, 2)
-    epsilon = int(epsilon_bin, 2)
+    gamma = 0
+    for i in range(width):
+        # if total number of ones in this place greater than zero
+        if ones[i] > zeros[i]:
+            gamma |= 1 << (width - 1 - i)
+    # epsilon has every bit of gamma flipped
+    epsilon = gamma ^ ((1 << width) - 1)
     # calculate result
     result = gamma * epsilon
 
-    #print(f"{gamma_bin=} {gamma=} {epsilon_bin=} {epsilon=} {result=}")
-    return result
+    return Result(result, {"gamma": gamma, "epsilon": epsilon})
 
 
-def part_b(test_input):
-    input_length = len(test_input[0])
-    # find oxygen generator rating (most common bits)
-    o = None
-    curr_o = test_input.copy()
+def rating(values: npt.NDArray, width: int, most_common: bool) -> int:
+    """
+        Filter the report by bit criteria until one value is left.
 
-    # find co2 scrubber rating (least common bits)
-    co2 = None
-    curr_co2 = test_input.copy()
-
-    for bit in range(0, input_length):       
-        ones_o = []
-        zeros_o = []
-        ones_co2 = []
-        zeros_co2 = []
-
-        if o is None:
-            # calculate bit occurences for oxygen
-            for input in curr_o:
-                if input[bit] == "0":
-                    zeros_o.append(input)
-                else:
-                    ones_o.append(input)
+        In the sorted report, the values that share the bits chosen so far are a contiguous range,
+        and within that range the ones with a 1 in the current bit all come after the ones with a 0.
+        So each bit is a binary search for the split point, O(bits * log N) for the whole rating.
+    """
+    lo, hi = 0, len(values)
+    prefix = 0
+    for i in range(width):
+        if hi - lo == 1:
+            break
+        bit = 1 << (width - 1 - i)
+        split = lo + int(np.searchsorted(values[lo:hi], np.uint64(prefix | bit)))
+        zeros = split - lo
+        ones = hi - split
 
+        if most_common:
             # only keep the inputs with the most popular bits (o2 generator rating)
-            curr_o = ones_o if len(ones_o) >= len(zeros_o) else zeros_o
+            keep_ones = ones >= zeros
+        else:
+            # keep the least popular bits (co2 scrubber rating), unless none of them have it
+            keep_ones = zeros == 0 or (0 < ones < zeros)
+
+        if keep_ones:
+            lo = split
+            prefix |= bit
+        else:
+            hi = split
+    return int(values[lo])
+
+
+def life_support_rating(values, width):
+    values = np.sort(values)
+    # find oxygen generator rating (most common bits)
+    o = rating(values, width, True)
+    # find co2 scrubber rating (least common bits)
+    co2 = rating(values, width, False)
 
-        if co2 is None: 
-            # calculate bit occurences for co2
-            for input in curr_co2:
-                if input[bit] == "0":
-                    zeros_co2.append(input)
-                else:
-                    ones_co2.append(input)
-            curr_co2 = zeros_co2 if len(zeros_co2) <= len(ones_co2) else ones_co2
+    result = o * co2
 
+    return Result(result, {"o": o, "co2": co2})
 
-        if len(curr_o) == 1:
-            o = int(curr_o[0], 2)
-            #print(f"Found oxygen generator rating: binary={curr_o[0]}, ({o=})")
 
-        if len(curr_co2) == 1:
-            co2 = int(curr_co2[0], 2)
-            #print(f"Found co2 scrubber rating: binary={curr_co2[0]}, ({co2=})")
+def part_a(file):
+    return power_consumption(*parse_input(file))
 
 
-    result = o * co2
-    print(f"Oxygen Generator Rating: {o=}, CO2 Scrubber Rating: {co2=}, {result=}")
-    
-    return result
+def part_b(file):
+    return life_support_rating(*parse_input(file))
 
 
 test_case = ["00100","11110","10110","10111","10101","01111","00111","11100","10000","11001","00010","01010"]
+test_report = pack("\n".join(test_case).encode())
 
 if __name__ == "__main__":
-    with open("input.txt") as data:
-        lines = data.read().splitlines()
-
-    print(f"Test A result: {part_a(test_case)}")
-    print(f"Part A: {part_a(lines)}")
+    print(f"Test A result: {power_consumption(*test_report)}")
+    report(part_a, "./input.txt")
 
-    print(f"Test B result: {part_b(test_case)}")
-    print(f"Part B: {part_b(lines)}")
+    print(f"Test B result: {life_support_rating(*test_report)}")
+    report(part_b, "./input.txt")
 
 
 # Oxygen Generator Rating: o=23, CO2 Scrubber Rating: co2=10, result=230
 # Test B result: 230
 # Oxygen Generator Rating: o=1459, CO2 Scrubber Rating: co2=3178, result=4636702
-# Part B: 4636702
\ No newline at end of file
+# Part B: 4636702
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 4
 # https://adventofcode.com/2021/day/4
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
 class Board():
     """
@@ -10,7 +14,6 @@ class Board():
         self.columns = self.parse_cols(raw)
         self.rows = raw
         self.num = num
-        self.winner = False
 
     def parse_cols(self, input):
         """
@@ -64,97 +67,89 @@ def parse_input(file):
 
     return (draw_numbers, boards)
 
-def intersection(lst1, lst2):
+def index_boards(boards):
     """
-        Return the intersecting values in two lists
+        Map each number to the (board index, row, column) positions where it appears
     """
-    lst3 = [value for value in lst1 if value in lst2]
-    return lst3
-
-def check_board(board: Board, drawn_nums):
-    """
-        Brute force verify if a board is a winner
+    positions = dict()
+    for b, board in enumerate(boards):
+        for r, row in enumerate(board.rows):
+            for c, num in enumerate(row):
+                positions.setdefault(num, []).append((b, r, c))
+    return positions
+
+def play(draw_numbers, boards):
     """
-    # check rows 
-    for row in board.rows:
-        if len(intersection(drawn_nums, row)) == 5:
-            print(f"BINGO: {board.num=} {row=}")
-            return True
+        Play bingo on all of the boards in a single pass over the draw numbers.
 
-    # check columns
-    for col in board.columns:
-        if len(intersection(drawn_nums, col)) == 5:
-            print(f"BINGO: {board.num=} {col=}")   
-            return True 
+        Each board keeps a count of the marked numbers in each row and column and the sum of its
+        unmarked numbers, so marking a number is O(1) per position it appears at.
 
-    return False
-
-def get_unmarked_sum(board: Board, drawn_nums):
-    """
-        Return the sum of unmarked numbers on the board
+        Returns the boards in the order they win, as (board, last called number, unmarked sum).
+        The boards themselves are not modified, so they can be played again.
     """
-    sum = 0
-    for row in board.rows:
-        for num in row:
-            if num not in drawn_nums:
-                sum += num
-    return sum
+    positions = index_boards(boards)
+    row_hits = [[0] * len(board.rows) for board in boards]
+    col_hits = [[0] * len(board.columns) for board in boards]
+    unmarked = [sum(sum(row) for row in board.rows) for board in boards]
+    won = [False] * len(boards)
 
+    winners = []
+    for num in draw_numbers:
+        for b, r, c in positions.get(num, []):
+            # skip the board if it already had bingo
+            if won[b]:
+                continue
+            unmarked[b] -= num
+            row_hits[b][r] += 1
+            col_hits[b][c] += 1
+            board = boards[b]
+            if row_hits[b][r] == len(board.columns) or col_hits[b][c] == len(board.rows):
+                won[b] = True
+                winners.append((board, num, unmarked[b]))
+
+        # stop once every board has won
+        if len(winners) == len(boards):
+            break
+    return winners
+
+def play_to_win(draw_numbers, boards):
+    winners = play(draw_numbers, boards)
+    if not winners:
+        raise ValueError(f"no board wins with the {len(draw_numbers)} draw numbers")
+    return winners
+
+def score(winner):
+    board, last_called, unmarked_sum = winner
+    final_score = last_called * unmarked_sum
+    return Result(final_score, {"board": board.num, "unmarked_sum": unmarked_sum, "last_called": last_called})
 
 def find_winning_board(draw_numbers, boards):
     """
         Find the board that wins first
     """
-    nums = []
-    for num in draw_numbers:
-        nums.append(num)
-        for board in boards:
-            if check_board(board, nums):
-                unmarked_sum = get_unmarked_sum(board, nums)
-                final_score = num * unmarked_sum
-                print(f"{unmarked_sum=}, last_called={num}, final_score={final_score}")
-                return
+    return score(play_to_win(draw_numbers, boards)[0])
 
 def find_losing_board(draw_numbers, boards):
     """
         Find the board that wins last
     """
-    last_winner_board = None
-    last_winner_nums = None
+    return score(play_to_win(draw_numbers, boards)[-1])
 
-    nums = []
-    for num in draw_numbers:
-        nums.append(num)
-        for board in boards:
-            # skip the board if it already had bingo
-            if board.winner:
-                continue
-            if check_board(board, nums):
-                # keep track of the last winner
-                last_winner_board = board
-                last_winner_nums = nums.copy()
-                board.winner = True
+def part_a(file):
+    (draw, boards) = parse_input(file)
+    return find_winning_board(draw, boards)
 
-    # calculate the score for the last winner
-    unmarked_sum = get_unmarked_sum(last_winner_board, last_winner_nums)
-    final_score = last_winner_nums[-1] * unmarked_sum
-    print(f"{unmarked_sum=}, last_called={num}, final_score={final_score}")
+def part_b(file):
+    (draw, boards) = parse_input(file)
+    return find_losing_board(draw, boards)
 
 
 if __name__ == "__main__":
-    (test_draw, test_boards) = parse_input("./test_input.txt")
-    (draw, boards) = parse_input("./input.txt")
-
     print("========== Part A: Finding Winning Boards ==========")
-    print("Test Input:")
-    find_winning_board(test_draw, test_boards)
-
-    print("\nReal Input:")
-    find_winning_board(draw, boards)
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
 
     print("========== Part B: Finding Losing Boards ==========")
-    print("Test Input:")
-    find_losing_board(test_draw, test_boards)
-    
-    print("\nReal Input:")
-    find_losing_board(draw, boards)
\ No newline at end of file
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
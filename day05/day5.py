@@ -3,6 +3,23 @@
 # https://adventofcode.com/2021/day/5
 
 import numpy as np
+import re
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
+# Line orientations. The key of a line is the value that stays the same along it.
+HORIZONTAL = 0 # key is y
+VERTICAL = 1 # key is x
+DIAGONAL = 2 # x and y increase together, key is x - y
+ANTI_DIAGONAL = 3 # x increases as y decreases, key is x + y
+
+# "auto" engine: boards bigger than this are only rasterized if the lines cover enough of them
+SPARSE_MIN_CELLS = 1 << 22
+SPARSE_MAX_DENSITY = 1 / 16
 
 def parse_line(line):
     """
@@ -90,38 +107,260 @@ def count_overlap(map):
         Count the number of points in the 2d map where more than one
         line intersects.
     """
-    overlap = 0
-    for col, row in np.ndindex(map.shape):
-        #print(map[col, row])
-        if map[col, row] > 1:
-            overlap += 1
-    return overlap
+    return int((map > 1).sum())
+
+def parse_segments(file):
+    """
+        Parse the input file into an (N, 4) array with a row of x1, y1, x2, y2 for each line
+    """
+    with open(file) as data:
+        nums = re.findall(r"\d+", data.read())
+    return np.array(nums, dtype=np.int64).reshape(-1, 4)
+
+def rasterize(segments, diagonals, chunk_points=1 << 20):
+    """
+        Vectorized version of parse_horiz_vert/parse_diagonal.
+        Generates the points of a chunk of lines at once and counts how many lines cover
+        each point on the flattened point indices (y * columns + x).
+
+        The lines are only ever horizontal, vertical or 45 degree diagonals, so every line
+        moves by -1/0/+1 in x and y for each step.
+
+        The chunks are split on the number of points (about chunk_points each, or a single longer line)
+        rather than the number of lines, so the temporary arrays have a fixed size however long the lines are.
+    """
+    rows = int(segments[:, [1, 3]].max()) + 1 if len(segments) else 0
+    columns = int(segments[:, [0, 2]].max()) + 1 if len(segments) else 0
+    map = np.zeros(rows * columns, dtype=np.int32)
+
+    if not diagonals:
+        x1, y1, x2, y2 = segments.T
+        segments = segments[(x1 == x2) | (y1 == y2)]
+
+    x1, y1, x2, y2 = segments.T
+    all_lengths = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) + 1
+    # number of points up to the end of each line
+    ends = np.cumsum(all_lengths)
+
+    start = 0
+    while start < len(segments):
+        before = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, before + chunk_points, side="right")))
+        x1, y1, x2, y2 = segments[start:stop].T
+        lengths = all_lengths[start:stop]
+        start = stop
+
+        dx = np.sign(x2 - x1)
+        dy = np.sign(y2 - y1)
+
+        # line number of each point, and how many steps the point is from the start of its line
+        line = np.repeat(np.arange(len(lengths)), lengths)
+        steps = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        idx = (y1[line] + dy[line] * steps) * columns + x1[line] + dx[line] * steps
+        add_points(map, idx)
+
+    return map.reshape(rows, columns)
+
+def add_points(map, idx):
+    """
+        Add one to the flattened map for each point index (repeats included).
+
+        np.bincount is far faster than np.add.at, but it returns a dense count for the whole span
+        of the indices. That's only used when the span is no bigger than a few times the number of
+        points, otherwise the points are counted with np.unique, to keep the memory O(points)
+        instead of O(board) per chunk.
+    """
+    lo = int(idx.min())
+    hi = int(idx.max()) + 1
+    if hi - lo <= 4 * len(idx):
+        map[lo:hi] += np.bincount(idx - lo, minlength=hi - lo).astype(map.dtype)
+    else:
+        keys, counts = np.unique(idx, return_counts=True)
+        map[keys] += counts.astype(map.dtype)
+
+def line_key(orientation, x, y):
+    """
+        Key of the line with the given orientation that goes through (x, y)
+    """
+    if orientation == HORIZONTAL:
+        return y
+    if orientation == VERTICAL:
+        return x
+    if orientation == DIAGONAL:
+        return x - y
+    return x + y
+
+def line_point(orientation, key, t):
+    """
+        Point at position t along a line. t is the x value, except for vertical lines where it's y.
+    """
+    if orientation == HORIZONTAL:
+        return (t, key)
+    if orientation == VERTICAL:
+        return (key, t)
+    if orientation == DIAGONAL:
+        return (t, t - key)
+    return (t, key - t)
+
+def classify(x1, y1, x2, y2):
+    """
+        Return the orientation, key and [lo, hi] range of positions along the line for a segment
+    """
+    if y1 == y2:
+        return HORIZONTAL, y1, min(x1, x2), max(x1, x2)
+    if x1 == x2:
+        return VERTICAL, x1, min(y1, y2), max(y1, y2)
+    if x2 - x1 == y2 - y1:
+        return DIAGONAL, x1 - y1, min(x1, x2), max(x1, x2)
+    return ANTI_DIAGONAL, x1 + y1, min(x1, x2), max(x1, x2)
+
+def collinear_overlaps(intervals):
+    """
+        Sweep over the [lo, hi] intervals of segments on the same line and return the
+        sorted ranges that are covered by at least two of them.
+    """
+    events = sorted([(lo, 1) for lo, _ in intervals] + [(hi + 1, -1) for _, hi in intervals])
+    overlaps = []
+    depth = 0
+    start = None
+    for pos, delta in events:
+        prev = depth
+        depth += delta
+        if prev < 2 <= depth:
+            start = pos
+        elif depth < 2 <= prev:
+            overlaps.append((start, pos - 1))
+    return overlaps
 
-def part_a(file):
-    lines, map = parse_input(file)
-    parse_horiz_vert(lines, map)
-    overlap = count_overlap(map)
-    print(f"{map=} {overlap=}")
+def crossings(lines):
+    """
+        Find the points where two segments with different orientations cross.
+
+        For each segment, the keys of the lines of another orientation that cross it lie in a range
+        (the key changes linearly along the segment), so the candidates are found by bisecting the
+        segments of that orientation sorted by key.
+    """
+    points = set()
+    for a, b in combinations(range(4), 2):
+        group_b = sorted(lines[b])
+        keys_b = [key for key, _, _ in group_b]
+        for key_a, lo_a, hi_a in lines[a]:
+            # key of the crossing line in orientation b, at position t along segment a: alpha * t + beta
+            beta = line_key(b, *line_point(a, key_a, 0))
+            alpha = line_key(b, *line_point(a, key_a, 1)) - beta
+            k1, k2 = alpha * lo_a + beta, alpha * hi_a + beta
+
+            for i in range(bisect_left(keys_b, min(k1, k2)), bisect_right(keys_b, max(k1, k2))):
+                key_b, lo_b, hi_b = group_b[i]
+                # diagonals can cross between two points of the grid
+                if (key_b - beta) % alpha != 0:
+                    continue
+                x, y = line_point(a, key_a, (key_b - beta) // alpha)
+                t_b = y if b == VERTICAL else x
+                if lo_b <= t_b <= hi_b:
+                    points.add((x, y))
+    return points
 
-def part_b(file):
+def count_overlap_sparse(segments, diagonals):
+    """
+        Count the overlapping points without a map, memory is proportional to the number of segments
+        (plus the crossing points).
+
+        A point is covered more than once if it's in a range covered by two segments on the same
+        line, or if two segments with different orientations cross there. The ranges are counted
+        by their length, and each crossing point is checked against the ranges so that no point is
+        counted twice.
+    """
+    lines = [[] for _ in range(4)]
+    same_line = dict()
+    for x1, y1, x2, y2 in segments.tolist():
+        orientation, key, lo, hi = classify(x1, y1, x2, y2)
+        if orientation in (DIAGONAL, ANTI_DIAGONAL) and not diagonals:
+            continue
+        lines[orientation].append((key, lo, hi))
+        same_line.setdefault((orientation, key), []).append((lo, hi))
+
+    overlaps = dict()
+    total = 0
+    for line, intervals in same_line.items():
+        ranges = collinear_overlaps(intervals)
+        if ranges:
+            overlaps[line] = ([lo for lo, _ in ranges], ranges)
+            total += sum(hi - lo + 1 for lo, hi in ranges)
+
+    for x, y in crossings(lines):
+        # number of orientations with an overlapping range through this point
+        covered = 0
+        for orientation in range(4):
+            starts, ranges = overlaps.get((orientation, line_key(orientation, x, y)), ([], []))
+            t = y if orientation == VERTICAL else x
+            i = bisect_right(starts, t) - 1
+            if i >= 0 and ranges[i][1] >= t:
+                covered += 1
+
+        if covered == 0:
+            total += 1
+        else:
+            # already counted in each of the ranges, only count it once
+            total -= covered - 1
+    return total
+
+def choose_engine(segments, diagonals):
+    """
+        Pick the numpy engine for small boards, or when the lines cover a good part of the board,
+        otherwise the sparse engine.
+    """
+    if len(segments) == 0:
+        return "sparse"
+    x1, y1, x2, y2 = segments.T
+    cells = (int(np.maximum(y1, y2).max()) + 1) * (int(np.maximum(x1, x2).max()) + 1)
+    if not diagonals:
+        keep = (x1 == x2) | (y1 == y2)
+        x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+    points = int((np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) + 1).sum())
+    if cells <= SPARSE_MIN_CELLS or points / cells >= SPARSE_MAX_DENSITY:
+        return "numpy"
+    return "sparse"
+
+def count_vents(file, diagonals, engine):
+    """
+        Count the points where lines overlap with the chosen engine:
+          auto   - numpy or sparse, depending on the size and density of the board
+          numpy  - rasterize all of the lines in bulk
+          sparse - count overlaps from the segments without a map
+          loop   - mark the lines point by point on the map
+    """
+    if engine in ("auto", "numpy", "sparse"):
+        segments = parse_segments(file)
+        if engine == "auto":
+            engine = choose_engine(segments, diagonals)
+        if engine == "sparse":
+            return count_overlap_sparse(segments, diagonals)
+        map = rasterize(segments, diagonals)
+    elif engine == "loop":
+        lines, map = parse_input(file)
+        parse_horiz_vert(lines, map)
+        if diagonals:
+            parse_diagonal(lines, map)
+    else:
+        raise ValueError(f"unknown engine: {engine}")
+    return count_overlap(map)
+
+def part_a(file, engine="auto"):
+    overlap = count_vents(file, False, engine)
+    return Result(overlap)
+
+def part_b(file, engine="auto"):
     # Same thing as part A, but with diagonals
-    lines, map = parse_input(file)
-    parse_horiz_vert(lines, map)
-    parse_diagonal(lines, map)
-    overlap = count_overlap(map)
-    print(f"{map=} {overlap=}")
+    overlap = count_vents(file, True, engine)
+    return Result(overlap)
 
 if __name__ == "__main__":
     print("========== Part A ==========")
-    print("Test Input:")
-    part_a("./test_input.txt")
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
 
-    print("\nReal Input:")
-    part_a("./input.txt")
-    
     print("========== Part B ==========")
-    print("Test Input:")
-    part_b("./test_input.txt")
-
-    print("\nReal Input:")
-    part_b("./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
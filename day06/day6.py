@@ -2,7 +2,12 @@
 
 # Advent of Code 2021 - Day 6
 # https://adventofcode.com/2021/day/6
-import time 
+from typing import Dict, List, Optional
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
 def read_input(file):
     """
         Read input file and return a list of numbers
@@ -11,82 +16,106 @@ def read_input(file):
         line = data.read()
     return [int(x) for x in line.split(",")]
 
-def part_a(file):
-    """
-        Naiively count the number of fish that will spawn each day, by maintaining a list, with the size
-        being the number of total fish.
+# Fish are tracked as a histogram of how many fish have each timer value (0-8).
+# One day is a linear map on the histogram: every timer goes down by one, and the fish
+# at 0 reset to 6 and spawn the same number of new fish at 8.
+TIMERS = 9
 
-        Very slow -- exponential runtime :(
+def histogram(fish: List[int]) -> List[int]:
     """
-    start_time = time.time()
-    days = 80
-    input = read_input(file)
-    #print(f"initial_{input=}")
+        Count how many fish have each timer value
+    """
+    counts = [0] * TIMERS
+    for timer in fish:
+        counts[timer] += 1
+    return counts
 
-    for d in range(0, days):
-        max_idx = len(input)
-        for idx, day in enumerate(input):
-            if idx >= max_idx:
-                continue 
-            if day == 0:
-                input.append(8) # new fish created
-                input[idx] = 6 # 
-            else:
-                input[idx] -= 1
-        #print(f"Day {d+1}, {input=} total_fish={len(input)}")
+def transition_matrix() -> List[List[int]]:
+    """
+        Matrix M for one day, so that next = M * counts.
+    """
+    m = [[0] * TIMERS for _ in range(TIMERS)]
+    for timer in range(1, TIMERS):
+        m[timer - 1][timer] = 1
+    # fish at 0 reset to 6 and spawn new fish at 8
+    m[6][0] = 1
+    m[8][0] = 1
+    return m
 
-    print(f"After {days} days, total_fish={len(input)}, time={time.time() - start_time}")
-    return input
+def mat_mult(a: List[List[int]], b: List[List[int]]) -> List[List[int]]:
+    return [[sum(a[i][k] * b[k][j] for k in range(TIMERS)) for j in range(TIMERS)] for i in range(TIMERS)]
 
+def mat_vec(m: List[List[int]], v: List[int]) -> List[int]:
+    return [sum(m[i][k] * v[k] for k in range(TIMERS)) for i in range(TIMERS)]
 
-def part_b(file):
+def simulate(counts: List[int], days: int, powers: Optional[List[List[List[int]]]] = None) -> List[int]:
     """
-        Instead of continually appending to a new list, just track how many new fish will 
-        be spawned at each day. 
+        Advance the histogram by `days` days with exponentiation by squaring: apply M^(2^k) for each
+        bit k set in `days`, O(log days) 9x9 multiplications instead of one step per day.
+        Python ints are exact, so this works for any number of days (the counts just get very long).
 
-        Much faster performance than part_a - linear performance instead of exponential
+        `powers` caches M, M^2, M^4, ... and is extended as needed, so it can be shared between calls.
     """
-    start_time = time.time()
-    days = 256
-    fish_to_spawn_each_day = [0] * days 
-
-    input = read_input(file)
+    if days < 0:
+        raise ValueError(f"can't simulate a negative number of days: {days}")
+    if powers is None:
+        powers = []
+    if not powers:
+        powers.append(transition_matrix())
+
+    bit = 0
+    while days:
+        if bit == len(powers):
+            powers.append(mat_mult(powers[-1], powers[-1]))
+        if days & 1:
+            counts = mat_vec(powers[bit], counts)
+        days >>= 1
+        bit += 1
+    return counts
+
+def count_fish(fish: List[int], days: int) -> int:
+    """
+        Total number of fish after `days` days
+    """
+    return sum(simulate(histogram(fish), days))
 
-    for _, num in enumerate(input):
-        #  initialize it!
-        fish_to_spawn_each_day[num] += 1
-    
-    total = len(input)
+def count_fish_batch(fish: List[int], days: List[int]) -> Dict[int, int]:
+    """
+        Answer many day-count queries in one pass: walk the queries in increasing order,
+        advancing the same histogram by the gap between consecutive queries and reusing the
+        cached matrix powers. Returns a map of days -> total number of fish.
+    """
+    counts = histogram(fish)
+    powers: List[List[List[int]]] = []
+    totals = dict()
+    day = 0
+    for query in sorted(set(days)):
+        counts = simulate(counts, query - day, powers)
+        day = query
+        totals[query] = sum(counts)
+    return totals
 
-    for day in range(0, days):
-        total += fish_to_spawn_each_day[day]
-        try: 
-            # original fish will create a new fish after 7 days
-            fish_to_spawn_each_day[day + 7] += fish_to_spawn_each_day[day]
+def part_a(file):
+    """
+        Count the number of fish after 80 days.
+    """
+    days = 80
+    return Result(count_fish(read_input(file), days), {"days": days})
 
-            # new fish will create a newer fish after 9 days
-            fish_to_spawn_each_day[day + 9] += fish_to_spawn_each_day[day]
-        except IndexError:
-            # ignore if we go out of bounds
-            pass            
-            
-    print(f"After {days} days, total_fish={total}, time={time.time() - start_time}")
-    
 
+def part_b(file):
+    """
+        Count the number of fish after 256 days.
+    """
+    days = 256
+    return Result(count_fish(read_input(file), days), {"days": days})
 
 
 if __name__ == "__main__":
     print("========== Part A ==========")
-    print("Test Input:")
-    part_a("./test_input.txt")
-    
-    print("\nReal Input:")
-    part_a("./input.txt")
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
 
     print("========== Part B ==========")
-    print("Test Input:")
-    part_b("./test_input.txt")
-    
-    
-    print("\nReal Input:")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
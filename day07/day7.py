@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 7
 # https://adventofcode.com/2021/day/7
-import statistics 
-import math 
+import numpy as np
+import numpy.typing as npt
+from typing import Callable, List, Tuple
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
 def read_input(file):
     """
         Read input file and return a list of numbers
@@ -11,65 +17,124 @@ def read_input(file):
         line = data.read()
     return [int(x) for x in line.split(",")]
 
-def part_a(file):
+def linear(distance):
     """
-        Find the median of a list and then count the distance of each point to the median.
+        Part A cost: one fuel per step
     """
-    print(f"\n**** Part A; {file=}")
-
-    data = read_input(file)
-    data.sort()
+    return distance
 
-    # find median
-    median = statistics.median(data)
+def triangular(distance):
+    """
+        Part B cost: each extra step costs one additional fuel, 1 + 2 + ... + d = d * (d + 1) / 2.
+        Works on ints and numpy arrays.
+    """
+    return distance * (distance + 1) // 2
 
-    # see how far away each data point is away from median 
-    total_cost = 0
+def fuel_cost(positions: npt.NDArray, target: int, cost: Callable = linear) -> int:
+    """
+        Total fuel to move every crab to target, for any cost function of the distance (vectorized).
+    """
+    return int(cost(np.abs(positions - target)).sum())
 
-    for pos in data:
-        total_cost += abs(pos-median) #if pos > median else (median-pos)
+def minimize_convex(total: Callable[[int], int], lo: int, hi: int) -> Tuple[int, int]:
+    """
+        Integer ternary search for the target in [lo, hi] with the lowest total cost.
+        Works for any total cost that is convex in the target, which is the case for any
+        cost function that is convex in the distance (a sum of convex functions is convex).
 
-    print(f"{median=} {total_cost=}")
+        Returns (target, total cost).
+    """
+    while hi - lo > 2:
+        m1 = lo + (hi - lo) // 3
+        m2 = hi - (hi - lo) // 3
+        if total(m1) <= total(m2):
+            hi = m2
+        else:
+            lo = m1
+    return min(((t, total(t)) for t in range(lo, hi + 1)), key=lambda x: x[1])
+
+def align(positions: List[int], cost: Callable = linear) -> Tuple[int, int]:
+    """
+        Find the target with the lowest total fuel for any cost function that is convex in the distance,
+        with the vectorized fuel_cost: O(N) per target tried, O(N log D) overall (D = range of positions).
 
+        Returns (target, total cost).
+    """
+    positions = np.array(positions, dtype=np.int64)
+    return minimize_convex(lambda t: fuel_cost(positions, t, cost), int(positions.min()), int(positions.max()))
 
-def part_b(file):
+class Crabs:
+    """
+        Sorted crab positions with prefix sums, so the total linear and triangular fuel
+        cost to any target are O(log N) (a binary search), instead of O(N).
     """
-        Find the mean of the input list and determine the lowest cost to move each point
-        to the mean, using the updated cost function.
+    def __init__(self, positions: List[int]):
+        self.positions = np.sort(np.array(positions, dtype=np.int64))
+        self.count = len(self.positions)
+        # prefix[i] = sum of the first i positions
+        self.prefix = np.concatenate(([0], np.cumsum(self.positions)))
+        self.total = int(self.prefix[-1])
+        # python ints, the squares can overflow int64
+        self.total_sq = sum(p * p for p in self.positions.tolist())
+
+    def distance_sums(self, target: int) -> Tuple[int, int]:
+        """
+            Sum of |p - target| and sum of (p - target)^2 over all of the crabs.
+        """
+        left = int(np.searchsorted(self.positions, target))
+        left_sum = int(self.prefix[left])
+        sum_d = target * left - left_sum + (self.total - left_sum) - target * (self.count - left)
+        sum_d2 = self.total_sq - 2 * target * self.total + self.count * target * target
+        return sum_d, sum_d2
+
+    def linear_cost(self, target: int) -> int:
+        return self.distance_sums(target)[0]
+
+    def triangular_cost(self, target: int) -> int:
+        # sum of d * (d + 1) / 2 = (sum of d^2 + sum of d) / 2
+        sum_d, sum_d2 = self.distance_sums(target)
+        return (sum_d2 + sum_d) // 2
+
+    def bounds(self) -> Tuple[int, int]:
+        return int(self.positions[0]), int(self.positions[-1])
+
+def part_a(file, prefix_sums=True):
     """
-    print(f"\n**** Part B; {file=}")
-    data = read_input(file)
+        Find the median of a list and then count the distance of each point to the median.
+        Without prefix_sums, it searches the target with the generic vectorized cost instead.
+    """
+    if not prefix_sums:
+        target, total_cost = align(read_input(file), linear)
+        return Result(total_cost, {"target": target})
+
+    crabs = Crabs(read_input(file))
 
-    # find mean; round up and down, see which result has lower cost
-    raw_mean = statistics.mean(data)
-    mean_floor = math.floor(raw_mean)
-    mean_ceil = math.ceil(raw_mean)
+    # the median minimizes the sum of distances
+    median = int(crabs.positions[(crabs.count - 1) // 2])
+    total_cost = crabs.linear_cost(median)
 
-    # see how far away each data point is away from both means
-    total_cost_floor = 0
-    total_cost_ceil = 0
+    return Result(total_cost, {"median": median})
 
-    for pos in data:
-        # difference between position and floor()'d mean 
-        diff_f = abs(pos-mean_floor)
-        cost = 1
-        for _ in range(0, diff_f):
-            total_cost_floor += cost
-            cost += 1 # (part b) each extra step costs one additional fuel
 
-        # difference between position and ceil()'d mean 
-        diff_c = abs(pos-mean_ceil)
-        cost = 1
-        for _ in range(0, diff_c):
-            total_cost_ceil += cost 
-            cost += 1 # (part b) each extra step costs one additional fuel
+def part_b(file, prefix_sums=True):
+    """
+        Find the position with the lowest cost to move each point to, using the updated cost function.
+        The total cost is convex, so a ternary search over the range of positions finds it.
+        Without prefix_sums, each target's cost is the vectorized closed form over all of the crabs.
+    """
+    if not prefix_sums:
+        target, total_cost = align(read_input(file), triangular)
+        return Result(total_cost, {"target": target})
 
-    print(f"{raw_mean=} {total_cost_floor=} {total_cost_ceil=} answer={min(total_cost_floor, total_cost_ceil)}")
+    crabs = Crabs(read_input(file))
 
-if __name__ == "__main__":
+    target, total_cost = minimize_convex(crabs.triangular_cost, *crabs.bounds())
 
-    part_a("./test_input.txt")
-    part_a("./input.txt")
+    return Result(total_cost, {"target": target})
+
+if __name__ == "__main__":
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
 
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 8
 # https://adventofcode.com/2021/day/8
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report, read_lines, map_chunks
 
 def parse_input(file):
     """
@@ -12,12 +16,19 @@ def parse_input(file):
     signals = []
     output = []
     for line in lines:
-        s, o = line.split(" | ")
-        signals.append(s.split(" "))
-        output.append(o.split(" "))
+        s, o = parse_line(line)
+        signals.append(s)
+        output.append(o)
 
     return signals,output
 
+def parse_line(line):
+    """
+        Split a line into its list of signals and list of outputs
+    """
+    s, o = line.split(" | ")
+    return s.split(" "), o.split(" ")
+
 
 # two -> uses 5 inputs
 # three -> uses 5 inputs 
@@ -32,169 +43,128 @@ def parse_input(file):
 # seven -> uses 3 inputs  **
 # eight -> uses 7 inputs **
 
-def check_signal(signal):
+def to_mask(signal):
     """
-        Method that determines if a signal is a specific number (1,4,7,8) based on the length of the signal
+        Convert a signal like 'cfg' to a 7-bit mask, with bit 0 for 'a' up to bit 6 for 'g'
     """
-    if len(signal) == 2:
-        return [1]
-    elif len(signal) == 3:
-        return [7]
-    elif len(signal) == 4:
-        return [4]
-    elif len(signal) == 7:
-        return [8]
-    elif len(signal) == 6:
-        return [0, 6, 9]
-    elif len(signal) == 5:
-        return [2, 3, 5]
+    mask = 0
+    for c in signal:
+        mask |= 1 << (ord(c) - ord("a"))
+    return mask
+
+def popcount(mask):
+    return bin(mask).count("1")
 
 def parse_signals(signals):
     """
-        Method that programatically determines which letter each signal corresponds to.
-        note: I misunderstood the problem and wrote this, when it's major overkill lol (this info is given in part 2)
-    """
-    # top, top/left, top/right, middle, bottom/left, bottom/right, bottom
-    t = tl = tr = m = bl = br = b = None
-
-     
-    # count each time a letter appears 
-    letter_count = dict()
-    for signal in signals:
-        for c in signal:
-            curr = letter_count.get(c) or 0
-            letter_count[c] = curr + 1 
-
-    # we can definitively find top/left, bottom/left, bottom/right
-    # based on the number of times it shows up in all 10 samples
-    for a,b in letter_count.items():
-        # top/left -> shows up 6x
-        # bottom/left -> 4x
-        # bottom/right -> 9x
-        # top -> 8x
-        # top/right 8x 
-        # middle -> 7x
-        # bottom -> 7x
-
-        if b == 6:
-            tl = a
-        elif b == 4:
-            bl = a 
-        elif b == 9:
-            br = a
-
-
-    # create the output array
-    # each index will contain the characters that make that number
-    nums = [[]] * 10
-
-    # see if the number of characters is unique
-    # We will find the definite signal for these: 1, 7, 4, 8
-    for signal in signals: 
-        num = check_signal(signal)
-        if len(num) == 1:
-            nums[num[0]] = [c for c in signal] 
-    
-    # we know bottom/right (br) and we know 1
-    # so we can determine top right 
-    tr = [x[0] for x in filter(lambda a: a not in br, nums[1])][0]
-    #print(f"{nums[1]=} {br=} {tr=}")
-
-    # top and top/right show up the same amount of times (8)
-    # since we know top/right, we can find out top 
-    t = [x[0] for x in filter(lambda a: a[1] == 8 and a[0] != tr, letter_count.items())] 
-    #print(f"{t=}")
-
-    # middle is 4 without tl, tr, br
-    m = [x for x in filter(lambda a: a not in [tl, tr, br], nums[4])]
-    #print(f"{nums[4]=} {m=}")
-
-    # 9 is 8 without bl
-    nums[9] = [x for x in filter(lambda a: a not in bl, nums[8])]
-    #print(f"{nums[8]=} {nums[9]=}")
-    
-    # 5 is 9 without tr
-    nums[5] = [x for x in filter(lambda a: a not in tr, nums[9])]
-    #print(f"{nums[5]=} {nums[9]=}")
-
-    # 6 is 5 with bl 
-    nums[6] = nums[5].copy()
-    nums[6].append(bl)
-    #print(f"{nums[5]=} {nums[6]=}")
-    
-    # 3 is 8  without tl and bl
-    nums[3] = [x for x in filter(lambda a: a not in [tl, bl], nums[8])]
-    #print(f"{nums[3]=}")
-
-    # 2 is 8 without tl and br
-    nums[2] = [x for x in filter(lambda a: a not in [tl, br], nums[8])]
-    #print(f"{nums[2]=}")
-
-    # 0 is all the same as 8 except one (middle)
-    nums[0] = [x for x in filter(lambda a: a not in m, nums[8])]
-    #print(f"{nums[0]=}")
+        Determine which pattern is which number, returns a map of pattern mask -> number.
 
-    # return a map of signal (sorted string) -> num
-    out = dict() 
-    for idx,val in enumerate(nums): 
-        sorted_num_str = [c for c in val]
-        sorted_num_str.sort()
-        out["".join(sorted_num_str)] = idx
-    return out
+        1, 4, 7 and 8 are the only numbers using 2, 4, 3 and 7 segments. The rest can be told
+        apart by which of the segments of 1 and 4 they share:
+          6 segments: 9 contains all of 4, 0 contains all of 1, otherwise 6
+          5 segments: 3 contains all of 1, 5 shares 3 segments with 4, otherwise 2
+    """
+    masks = [to_mask(signal) for signal in signals]
+    by_length = {len(signal): mask for signal, mask in zip(signals, masks)}
+    one = by_length[2]
+    four = by_length[4]
+
+    nums = dict()
+    for signal, mask in zip(signals, masks):
+        length = len(signal)
+        if length == 2:
+            num = 1
+        elif length == 3:
+            num = 7
+        elif length == 4:
+            num = 4
+        elif length == 7:
+            num = 8
+        elif length == 6:
+            if mask & four == four:
+                num = 9
+            elif mask & one == one:
+                num = 0
+            else:
+                num = 6
+        else:
+            if mask & one == one:
+                num = 3
+            elif popcount(mask & four) == 3:
+                num = 5
+            else:
+                num = 2
+        nums[mask] = num
+    return nums
 
 
 def parse_output(output, nums):
     """
-        Parse output signals into numbers, given the signal->number map
+        Parse output signals into numbers, given the signal mask -> number map
     """
-    out_nums = []
-    for segment in output:
-        chars = [c for c in segment]
-        chars.sort() 
-        num = nums["".join(chars)]
-        out_nums.append(num)
+    return [nums[to_mask(segment)] for segment in output]
 
-    return out_nums    
+# 1, 4, 7 and 8 are the numbers with a unique number of segments, no need to decode them
+UNIQUE_LENGTHS = [2, 4, 3, 7]
 
-def part_a(file):
+def decode_entries(signals, output):
     """
-        Determine the number of times 1,4,7,or 8 appears in the input
+        Decode the display entries, returns the number of times 1, 4, 7 or 8 appears in the
+        outputs (part a) and the sum of the output numbers (part b)
     """
-    print(f"\n**** Part A; {file=}")
-    signals, output = parse_input(file)
-
-    digits = [1,4,7,8]
     count = 0
-    for sig,out in zip(signals, output):        
-        nums = parse_signals(sig)
-        out_nums = parse_output(out, nums)        
-        
-        for n in out_nums:
-            if n in digits:
+    sum = 0
+    for sig,out in zip(signals, output):
+        for segment in out:
+            if len(segment) in UNIQUE_LENGTHS:
                 count += 1
-    
-    print(f"{nums=}; {out_nums=}; {count=}")
 
-     
+        nums = parse_signals(sig)
+        combined_num = 0
+        for n in parse_output(out, nums):
+            combined_num = combined_num * 10 + n
+        sum += combined_num
+    return count, sum
 
-def part_b(file):
+def decode_chunk(file, start, end):
     """
-        Sum all of the output signal numbers
+        decode_entries for the lines in a byte range of the file (map_chunks worker)
     """
-    print(f"\n**** Part B; {file=}")
-    signals, output = parse_input(file)
+    signals = []
+    output = []
+    for line in read_lines(file, start, end):
+        s, o = parse_line(line.decode())
+        signals.append(s)
+        output.append(o)
+    return decode_entries(signals, output)
 
-    sum = 0
-    for sig,out in zip(signals, output):        
-        nums = parse_signals(sig)
-        out_nums = parse_output(out, nums)
-        combined_num = int("".join([str(i) for i in out_nums]))
-        sum += combined_num
+def decode_file(file, workers=1):
+    """
+        decode_entries for a whole file. The entries are independent, so with more than one worker
+        the file is split into chunks that are decoded in parallel processes, and the counts summed.
+    """
+    if workers == 1:
+        return decode_entries(*parse_input(file))
 
-    print(f"{sum=}")
+    results = map_chunks(decode_chunk, file, workers)
+    return sum(count for count, _ in results), sum(total for _, total in results)
+
+def part_a(file, workers=1):
+    """
+        Determine the number of times 1,4,7,or 8 appears in the input
+    """
+    count, _ = decode_file(file, workers)
+    return Result(count)
+
+def part_b(file, workers=1):
+    """
+        Sum all of the output signal numbers
+    """
+    _, sum = decode_file(file, workers)
+    return Result(sum)
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
@@ -1,108 +1,125 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 9
 # https://adventofcode.com/2021/day/9
-from sys import maxsize
-from heapq import nlargest
 from math import prod
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
-def parse_input(file):
-    with open(file) as data:
-        lines = data.read().splitlines()
-    
-    out = []
-    for line in lines:
-        out.append([int(x) for x in line])
-
-    # return 2d array
-    return out
+def parse_heights(file):
+    """
+        Read the height map straight into a 2d numpy array
+    """
+    with open(file, "rb") as data:
+        raw = data.read().strip().replace(b"\r", b"") + b"\n"
+    cols = raw.index(b"\n")
+    # view the file as a (rows, cols + 1) matrix of characters, the last column is the newline
+    return (np.frombuffer(raw, dtype=np.uint8).reshape(-1, cols + 1)[:, :cols] - ord("0")).astype(np.int8)
 
-def find_low_points(data):
+def find_low_points(heights):
     """
         Helper method that finds the 'low' points in a 2d array.
         Low points are points that have a lower value than all of the surrounding points
         (above, below, left, right)
 
-        This method will return a list of (x,y) points and a list of the values of those points for convenience.
-    """
-    rows = len(data)
-    cols = len(data[0])
-
-    low_points = []
-    low_point_vals = []
+        Vectorized: the map is padded with a border of 10s (higher than any point), and every
+        point is compared against the shifted views of its four neighbors at once.
 
-    for i in range(0, rows):
-        for j in range (0, cols):
-            curr = data[i][j]
-
-            # Find the surrounding values. If out of bounds, set to sys.maxsize
-            left = data[i][j-1] if j-1 >= 0 else maxsize
-            right = data[i][j+1] if j+1 < cols else maxsize
-            up = data[i-1][j] if i-1 >= 0 else maxsize
-            down = data[i+1][j] if i+1 < rows else maxsize
-
-            # Check if the current point is lower than all the surrounding points
-            if curr < left and curr < right and curr < up and curr < down:
-                low_points.append((i,j))
-                low_point_vals.append(curr)
-
-    return low_points, low_point_vals
+        This method will return a (N, 2) array of (row, col) points and an array of the values of those points.
+    """
+    padded = np.pad(heights, 1, constant_values=10)
+    center = padded[1:-1, 1:-1]
+    low = (
+        (center < padded[1:-1, :-2]) &  # left
+        (center < padded[1:-1, 2:]) &   # right
+        (center < padded[:-2, 1:-1]) &  # up
+        (center < padded[2:, 1:-1])     # down
+    )
+    low_points = np.argwhere(low)
+    return low_points, heights[low]
 
 def part_a(file):
     """
         Find the 'low' points in a 2d array and calculate the total 'risk score'.
     """
-    print(f"\n**** Part A; {file=}")
-    data = parse_input(file)
+    heights = parse_heights(file)
 
-    _, low_points = find_low_points(data)
-        
-    risk_score = len(low_points) + sum(low_points)
-    print(f"{len(low_points)=} {risk_score=}")
+    _, low_points = find_low_points(heights)
 
-def ff(i, j, data, visited, prev, basin):
-    """
-        Recursive flood fill algorithm.
-        Creates a 'basin' array that has all of the points in the 'data' array 
-        which are in a 'basin' (part b)
-    """
+    risk_score = len(low_points) + int(low_points.sum())
+    return Result(risk_score, {"low_points": len(low_points)})
 
-    # bounds check, check if visited already, check if value is larger than prev, check if value is 9
-    if i < 0 or i >= len(data) or j < 0 or j >= len(data[0]) or visited[i][j] or data[i][j] == 9 or data[i][j] <= prev:
-        return
+def label_basins(heights):
+    """
+        Label every basin in the height map at once, with a vectorized union-find over the flat array.
+        Basins are the areas of connected points that aren't a 9.
 
-    basin.append((i,j))
-    visited[i][j] = True
+        Every pair of adjacent non-9 points is an edge. Each round, the edges that connect two
+        different trees hook the root with the larger index onto the smaller one, then the
+        parent pointers are jumped (parent = parent[parent]) until every point points to its root.
 
-    ff(i+1, j, data, visited, prev, basin)
-    ff(i-1, j, data, visited, prev, basin)
-    ff(i, j+1, data, visited, prev, basin)
-    ff(i, j-1, data, visited, prev, basin)
+        Returns the flat array of labels (the smallest index in each basin), -1 for the 9s.
+    """
+    rows, cols = heights.shape
+    mask = (heights != 9).ravel()
+    idx = np.arange(rows * cols)
+
+    # edges to the right (not wrapping around to the next row) and down
+    right = mask[:-1] & mask[1:] & (idx[:-1] % cols != cols - 1)
+    down = mask[:-cols] & mask[cols:]
+    u = np.concatenate((idx[:-1][right], idx[:-cols][down]))
+    v = np.concatenate((u[:right.sum()] + 1, u[right.sum():] + cols))
+
+    parent = idx.copy()
+    while True:
+        root_u = parent[u]
+        root_v = parent[v]
+        joined = root_u != root_v
+        if not joined.any():
+            break
+        np.minimum.at(parent, np.maximum(root_u, root_v)[joined], np.minimum(root_u, root_v)[joined])
+
+        # pointer jumping until everything points to a root
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+
+    parent[~mask] = -1
+    return parent
+
+def basin_sizes(heights, low_points=None):
+    """
+        Return the size of every basin in the height map, or if given the (N, 2) array
+        of low points, the size of the basin each low point is in.
+    """
+    labels = label_basins(heights)
+    sizes = np.bincount(labels[labels >= 0], minlength=len(labels))
+    if low_points is None:
+        return sizes[sizes > 0]
+    return sizes[labels[low_points[:, 0] * heights.shape[1] + low_points[:, 1]]]
 
 def part_b(file):
     """
         Find the 'basins' in a 2d array. 
     """
-    print(f"\n**** Part B; {file=}")
-    data = parse_input(file)
-
-    # Start with a list of the low points
-    low_points, _ = find_low_points(data)
+    heights = parse_heights(file)
 
     # Find the size of the basins around all of the low points
-    basin_lengths = []
-    for point in low_points:
-        basin = [] # will be modified by floodfill function
-        ff(point[0], point[1], data, [[False for _ in range(0,len(data[0]))] for _ in range(0,len(data))], -1, basin)
-        basin_lengths.append(len(basin))
+    low_points, _ = find_low_points(heights)
+    basin_lengths = basin_sizes(heights, low_points)
 
     # Determine the top three basin sizes and the product of those three.
-    top_three = nlargest(3, basin_lengths)
+    top_three = [int(x) for x in np.sort(basin_lengths)[::-1][:3]]
     top_three_prod = prod(top_three)
-    
-    print(f"{top_three=} {top_three_prod=}")
+
+    return Result(top_three_prod, {"top_three": top_three})
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
@@ -3,95 +3,104 @@
 
 # Advent of Code 2021 - Day 10
 # https://adventofcode.com/2021/day/10
+from typing import Iterable, List, Tuple
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report, read_lines, map_chunks
 
-# Map of opening to closing parentheses
-char_map = {
-    "(" : ")",
-    "{" : "}",
-    "<" : ">",
-    "[" : "]",
-}
+# Lookup tables indexed by byte value
+# CLOSER: the closing character expected for an opening character (0 if not an opening character)
+# CORRUPTED_SCORE: score of an illegal closing character (part a)
+# COMPLETION_SCORE: score of a closing character needed to complete a line (part b)
+CLOSER = [0] * 256
+CORRUPTED_SCORE = [0] * 256
+COMPLETION_SCORE = [0] * 256
+for opener, closer, corrupted, completion in [(b"(", b")", 3, 1), (b"[", b"]", 57, 2), (b"{", b"}", 1197, 3), (b"<", b">", 25137, 4)]:
+    CLOSER[opener[0]] = closer[0]
+    CORRUPTED_SCORE[closer[0]] = corrupted
+    COMPLETION_SCORE[closer[0]] = completion
 
-def parse_input(file):
+def check_line(line: bytes) -> Tuple[int, int]:
     """
-        Read an input file and return a list of the lines, where each line is the list of chars.
+        Check the brackets in a line in a single scan.
+        Returns (corrupted score, completion score): the score of the first illegal character for a
+        corrupted line, or the score of the characters needed to complete an incomplete line
+        (the other score is 0).
     """
-    with open(file) as data:
-        lines = data.read().splitlines()
-    return [[c for c in line] for line in lines]
+    # stack of the closing characters we expect, in order
+    stack = bytearray()
+    for char in line:
+        closer = CLOSER[char]
+        if closer:
+            stack.append(closer)
+        elif stack and stack[-1] == char:
+            stack.pop()
+        else:
+            return CORRUPTED_SCORE[char], 0
 
-def part_a(file):
+    score = 0
+    for closer in reversed(stack):
+        score = score * 5 + COMPLETION_SCORE[closer]
+    return 0, score
+
+def check_lines(lines: Iterable[bytes]) -> Tuple[int, List[int]]:
     """
-        Find invalid parentheses. 
+        Check all of the lines, returns the total corrupted score and the list of completion scores
+        of the incomplete lines.
     """
-    print(f"\n**** Part A; {file=}")
-    value_map = {
-        ")" : 3,
-        "}" : 1197,
-        ">" : 25137,
-        "]" : 57
-    }
+    corrupted_total = 0
+    completion_scores = []
+    for line in lines:
+        corrupted, completion = check_line(line)
+        corrupted_total += corrupted
+        if completion:
+            completion_scores.append(completion)
+    return corrupted_total, completion_scores
 
-    data = parse_input(file)
-    #print(f"{data=}")
-    score = 0
-    for line in data:
-        stack = []
-        for char in line:
-            if char in char_map.keys():
-                stack.append(char)
-            else: 
-                expected_char = char_map[stack.pop()]
-                if char != expected_char:
-                    #print(f"illegal char: {char}, {value_map[char]=}")
-                    score += value_map[char] 
-    print(f"{score=}")
+def check_chunk(file: str, start: int, end: int) -> Tuple[int, List[int]]:
+    """
+        check_lines for the lines in a byte range of the file (map_chunks worker)
+    """
+    return check_lines(read_lines(file, start, end))
 
-def part_b(file):
+def check_file(file: str, workers: int = 1) -> Tuple[int, List[int]]:
     """
-        Find the incomplete lines and find the correct ending characters.
+        check_lines for a whole file. The lines are independent, so with more than one worker the
+        file is split into chunks that are checked in parallel processes, and the results are merged:
+        the corrupted scores are summed and the completion score lists concatenated.
     """
-    print(f"\n**** Part B; {file=}")
-    value_map = {
-        ")" : 1,
-        "}" : 3,
-        ">" : 4,
-        "]" : 2
-    }
-    data = parse_input(file)
-    
-    # find the incomplete lines
-    scores = []
-    for line in data:
-        stack = []
-        invalid = False
-        for char in line:
-            if char in char_map.keys():
-                stack.append(char)
-            else: 
-                expected_char = char_map[stack.pop()]
-                if char != expected_char:
-                    # ignore invalid lines 
-                    invalid = True
-                    break 
-        
-        # find the closing characters for the incomplete line
-        if len(stack) > 0 and not invalid:
-            closing_chars = [char_map[c] for c in reversed(stack)]
+    if workers == 1:
+        return check_lines(read_lines(file))
 
-            # python 3.8 assignment expressions !!
-            score = 0
-            [score := score * 5 + value_map[n] for n in closing_chars]
-            scores.append(score)
-            #print(f"{closing_chars=} {score=}")
+    corrupted_total = 0
+    completion_scores: List[int] = []
+    for corrupted, completion in map_chunks(check_chunk, file, workers):
+        corrupted_total += corrupted
+        completion_scores.extend(completion)
+    return corrupted_total, completion_scores
 
+def middle_score(scores: List[int]) -> int:
     # return the middle score in the list of sorted scores
-    scores.sort()
-    middle_score = scores[int(len(scores) / 2)]
-    print(f"{middle_score=}")
+    scores = sorted(scores)
+    return scores[len(scores) // 2]
+
+def part_a(file, workers=1):
+    """
+        Find invalid parentheses. 
+    """
+    score, _ = check_file(file, workers)
+    return Result(score)
+
+def part_b(file, workers=1):
+    """
+        Find the incomplete lines and find the correct ending characters.
+    """
+    _, scores = check_file(file, workers)
+    return Result(middle_score(scores))
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
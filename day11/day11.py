@@ -1,81 +1,161 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 11
 # https://adventofcode.com/2021/day/11
+import numpy as np
+import numpy.typing as npt
+from typing import List, Optional, Tuple
+import hashlib
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
-def parse_input(file):
+def parse_input(file: str) -> npt.NDArray:
     with open(file) as data:
         lines = data.read().splitlines()
     # 2d array 
-    return [[int(c) for c in line] for line in lines]
+    return np.array([[int(c) for c in line] for line in lines], dtype=np.int8)
 
-# Floodfill 
-def ff(x, y, grid, flashed):
+def count_neighbors(mask: npt.NDArray) -> npt.NDArray:
     """
-        Modified floodfill algorithm that checks a single index in the grid. Will flood-fill increment 
-        adjacent nodes in the grid whenever the current value equals 9.
+        For each point in the grid, count how many of the 8 adjacent points are set in the mask
     """
-    # check out of bounds or if the current position already flashed this step
-    if x < 0 or y < 0 or x >= len(grid) or y >= len(grid[0]) or (grid[x][y] == 0 and (x, y) in flashed):
-        return
+    padded = np.pad(mask.astype(np.int8), 1)
+    rows, cols = mask.shape
+    counts = np.zeros(mask.shape, dtype=np.int8)
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            if dx != 1 or dy != 1:
+                counts += padded[dx:dx + rows, dy:dy + cols]
+    return counts
 
-    curr = grid[x][y]
-    if curr < 9:
-        grid[x][y] += 1
-        return 
+def step(grid: npt.NDArray) -> int:
+    """
+        Advance the grid by one step in place and return the number of flashes.
+
+        Every octopus goes up by one. Then, in waves, the octopuses above 9 that didn't flash yet
+        flash and increase their neighbors, until a wave has no new flashes. An octopus can only get
+        8 increases from its neighbors, so the values stay small enough for int8.
+    """
+    grid += 1
+    flashed = np.zeros(grid.shape, dtype=bool)
+    while True:
+        flashing = (grid > 9) & ~flashed
+        if not flashing.any():
+            break
+        flashed |= flashing
+        grid += count_neighbors(flashing)
+
+    # everything that flashed resets to 0
+    grid[flashed] = 0
+    return int(flashed.sum())
+
+def state_key(grid: npt.NDArray) -> bytes:
+    """
+        16 byte digest of a grid state, so the states seen so far take the same memory for any grid size
+    """
+    return hashlib.blake2b(grid.tobytes(), digest_size=16).digest()
+
+def replay(grid: npt.NDArray, steps: int) -> npt.NDArray:
+    """
+        Return a copy of the grid after a number of steps
+    """
+    grid = grid.copy()
+    for _ in range(steps):
+        step(grid)
+    return grid
+
+def explore(grid: npt.NDArray, max_steps: Optional[int] = None, stop_on_sync: bool = False) -> Tuple[List[int], Optional[Tuple[int, int]]]:
+    """
+        Step the grid (in place), recording the number of flashes of each step and a digest
+        of every state, until one of:
+          - a state repeats: the steps are a cycle from then on, returns (cycle start, period)
+          - max_steps steps were run
+          - stop_on_sync is set and every octopus flashed in the last step
+
+        Returns the list of flashes per step, and the cycle if one was found.
+
+        Only the initial grid is kept besides the digests. When a digest repeats, the earlier state
+        is rebuilt from it to check that it really is the same state and not a hash collision.
+    """
+    initial = grid.copy()
+    seen = {state_key(grid): 0}
+    flashes: List[int] = []
+    while max_steps is None or len(flashes) < max_steps:
+        flashes.append(step(grid))
+        if stop_on_sync and flashes[-1] == grid.size:
+            break
+        key = state_key(grid)
+        start = seen.get(key)
+        if start is None:
+            seen[key] = len(flashes)
+        elif np.array_equal(replay(initial, start), grid):
+            return flashes, (start, len(flashes) - start)
+    return flashes, None
+
+def find_cycle(grid: npt.NDArray) -> Tuple[int, int]:
+    """
+        Return the (start, period) of the cycle the grid ends up in. There's only a finite number
+        of states, so there always is one, but it can take a long time for big grids.
+    """
+    _, cycle = explore(grid)
+    return cycle
+
+def total_flashes(flashes: List[int], cycle: Optional[Tuple[int, int]], steps: int) -> int:
+    """
+        Total number of flashes after a number of steps, extrapolating over the cycle for
+        steps beyond the ones that were simulated. O(cycle length) instead of O(steps).
+    """
+    if steps <= len(flashes):
+        return sum(flashes[:steps])
+    if cycle is None:
+        raise ValueError(f"only {len(flashes)} steps were simulated, and no cycle was found")
+    start, period = cycle
+    full_cycles, remainder = divmod(steps - start, period)
+    return sum(flashes[:start]) + full_cycles * sum(flashes[start:start + period]) + sum(flashes[start:start + remainder])
 
-    grid[x][y] = 0
-    flashed.append((x,y))
-    # recursively call all adjacent directions if curr_val is 9
-    # directions is a list of values to add/subtract from x,y
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (1,1), (-1, 1), (1, -1), (-1, -1)]
-    for d in directions:
-        ff(x + d[0], y + d[1], grid, flashed)
-     
+def run(grid: npt.NDArray, steps: int) -> int:
+    """
+        Run a number of steps and return the total number of flashes.
+        Stops simulating as soon as the grid is in a cycle. The grid passed in is not modified.
+    """
+    flashes, cycle = explore(grid.copy(), max_steps=steps)
+    return total_flashes(flashes, cycle, steps)
+
+def run_until_sync(grid: npt.NDArray, max_steps: Optional[int] = None) -> Optional[int]:
+    """
+        Run until every octopus flashes during the same step and return that step,
+        or None if it didn't happen within max_steps, or the grid got into a cycle without
+        a synchronized step (it will never happen then).
+        The grid is stepped in place, it's left at the last simulated step.
+    """
+    flashes, _ = explore(grid, max_steps=max_steps, stop_on_sync=True)
+    if flashes and flashes[-1] == grid.size:
+        return len(flashes)
+    return None
 
 def part_a(file):
     """
         Count the number of 'flashes' in 100 steps. 
     """
-    print(f"\n**** Part A; {file=}")
     grid = parse_input(file)
 
     steps = 100
-    flashes = 0
-    for _ in range(0, steps):
-        # for each step, we will check each index in the grid and perform floodfill if 
-        # the value at the index increases to 9. 
-        flashed = []
-        for x in range(0, len(grid)):
-            for y in range(0, len(grid[x])):
-                ff(x, y, grid, flashed)
-        flashes += len(flashed)
-
-    print(f"After {steps=}: {flashes=}")
+    flashes = run(grid, steps)
+
+    return Result(flashes, {"steps": steps})
 
 def part_b(file):
     """
         Find the first step where all of the nodes flash at the same time. 
     """
-    print(f"\n**** Part B; {file=}")
     grid = parse_input(file)
-    
-    flash_goal = len(grid) * len(grid[0])
-    step = 0
-    while(1):
-        flashed = []
-        # Increment each grid node by one, apply floodfill if node increases to 9
-        for x in range(0, len(grid)):
-            for y in range(0, len(grid[x])):
-                ff(x, y, grid, flashed)
-        
-        step += 1
-        # see if every node of the grid flashed
-        if len(flashed) == flash_goal: 
-            print(f"{step=} flashes={len(flashed)} {flash_goal=}")
-            return
+
+    sync_step = run_until_sync(grid)
+    return Result(sync_step, {"flashes": grid.size})
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
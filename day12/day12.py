@@ -2,134 +2,169 @@
 # Advent of Code 2021 - Day 12
 # https://adventofcode.com/2021/day/12
 
-from typing import List, Set, Dict
-
-class Node():
+from array import array
+from typing import List, Dict, Iterator, Tuple
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
+class CaveGraph():
     """
-        A Node object in a graph. Has a name, if it's a 'big' cave (uppercase), and contains a list of its neighbors.
+        Graph of the caves, with every cave interned to an integer id.
+
+        The edges are stored CSR style: the neighbors of cave i are targets[offsets[i]:offsets[i+1]].
+        Small caves (lower-case) are set in the `small` bitmask, so a set of visited small caves is
+        just an int. Edges back into 'start' are dropped when the graph is built, since no path can
+        ever go back there.
     """
-    def __init__(self, name: str):
-        self.name = name
-        # true if it's a node that's not 'start' or 'end' and it's upper-case
-        self.big = name not in ["start", "end"] and name.isupper()
-        self.edges = []
-    
+    def __init__(self, edges: List[Tuple[str, str]]):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = dict()
+        adjacency: List[List[int]] = []
+        for name_a, name_b in edges:
+            for name in (name_a, name_b):
+                if name not in self.ids:
+                    self.ids[name] = len(self.names)
+                    self.names.append(name)
+                    adjacency.append([])
+            a, b = self.ids[name_a], self.ids[name_b]
+            adjacency[a].append(b)
+            adjacency[b].append(a)
+
+        self.start = self.ids["start"]
+        self.end = self.ids["end"]
+
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        for neighbors in adjacency:
+            self.targets.extend(n for n in neighbors if n != self.start)
+            self.offsets.append(len(self.targets))
+        # zero-copy view of the edges, slicing it doesn't copy the neighbors like slicing the array does
+        self.edges = memoryview(self.targets)
+
+        self.small = 0
+        for i, name in enumerate(self.names):
+            if not name.isupper():
+                self.small |= 1 << i
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def neighbors(self, cave: int) -> memoryview:
+        return self.edges[self.offsets[cave]:self.offsets[cave + 1]]
+
+    def small_bit(self, cave: int) -> int:
+        """
+            The bit of the cave in the visited bitmask, 0 for big caves (they can be visited any number of times)
+        """
+        return self.small & (1 << cave)
+
     def __repr__(self):
-        edges = [val.name for val in self.edges]
-        return f"{self.name=} {self.big=} {edges=}"
+        edges = {self.names[i]: [self.names[n] for n in self.neighbors(i)] for i in range(len(self))}
+        return f"CaveGraph({edges})"
 
-def parse_input(file: str) -> Dict[str, Node]:
+def parse_input(file: str) -> CaveGraph:
     """
-        Parse the input file and return a dictionary of node names -> nodes.
+        Parse the input file and return the cave graph.
     """
     with open(file) as data:
         lines = data.read().splitlines()
 
-    # map name to node 
-    graph: Dict[str, Node] = dict() 
-
-    for line in lines:
-        node_a, node_b = line.split("-")
+    return CaveGraph([tuple(line.split("-")) for line in lines])
 
-        # Create the nodes in the graph if not already there.
-        if node_a not in graph: 
-            graph[node_a] = Node(node_a)
-        if node_b not in graph:
-            graph[node_b] = Node(node_b)
-
-        # Add the bi-directional edges between the nodes
-        graph[node_a].edges.append(graph[node_b])
-        graph[node_b].edges.append(graph[node_a])
+def find_paths(graph: CaveGraph, allow_twice: bool) -> Iterator[List[int]]:
+    """
+        Depth-first Search, yields all unique paths from 'start' to 'end' as lists of cave ids.
+        Visits the 'small' caves at most once, except for one of them that can be visited twice
+        if allow_twice (part b).
+    """
+    path = [graph.start]
 
-    return graph
-        
-def dfs(curr: Node, goal: Node, visited: List[Node]) -> int:
+    def dfs(curr: int, visited: int, twice: bool) -> Iterator[List[int]]:
+        if curr == graph.end:
+            yield path.copy()
+            return
+        for edge in graph.neighbors(curr):
+            bit = graph.small_bit(edge)
+            if not visited & bit:
+                next_twice = twice
+            elif allow_twice and not twice:
+                next_twice = True
+            else:
+                continue
+            path.append(edge)
+            yield from dfs(edge, visited | bit, next_twice)
+            path.pop()
+
+    yield from dfs(graph.start, graph.small_bit(graph.start), False)
+
+def path_names(graph: CaveGraph, path: List[int]) -> str:
+    return ",".join([graph.names[cave] for cave in path])
+
+def count_paths(graph: CaveGraph) -> Tuple[int, int]:
     """
-        Depth-first Search for Part A, find all unique paths from 'start' to 'end' nodes.
-        Visits the 'small' nodes at most once.
+        Count the paths from 'start' to 'end' for both parts in a single traversal, without building any paths.
+        Returns (part a count, part b count).
 
-        Returns the number of total paths.
+        The number of ways to finish a path only depends on the current cave, the set of small caves
+        already visited (a bitmask) and whether a small cave was already visited twice,
+        so the counts are memoized on those. Each state returns a pair of counts: the paths that
+        never visit a small cave twice (part a), and all of the allowed paths (part b).
     """
-    if curr == goal:
-        return 1
-    
-    # don't revisit small nodes
-    if not curr.big and curr in visited:
-        return 0
-
-    total = 0
-    visited.append(curr)
-    for edge in curr.edges:
-        total += dfs(edge, goal, visited)
-    
-    visited.remove(curr)
-    return total
-
-def part_a(file: str) -> None:
+    memo: Dict[Tuple[int, int, bool], Tuple[int, int]] = dict()
+
+    def count(curr: int, visited: int, twice: bool) -> Tuple[int, int]:
+        if curr == graph.end:
+            return (0 if twice else 1, 1)
+        key = (curr, visited, twice)
+        if key in memo:
+            return memo[key]
+
+        total_a = total_b = 0
+        for edge in graph.neighbors(curr):
+            bit = graph.small_bit(edge)
+            if not visited & bit:
+                # big cave, or small cave that wasn't visited yet
+                a, b = count(edge, visited | bit, twice)
+            elif not twice:
+                # visit this small cave a second time, only counts for part b
+                a, b = count(edge, visited, True)
+            else:
+                continue
+            total_a += a
+            total_b += b
+
+        memo[key] = (total_a, total_b)
+        return memo[key]
+
+    return count(graph.start, graph.small_bit(graph.start), False)
+
+def part_a(file: str) -> Result:
     """
         Find the number of unique paths from start->end nodes in a graph.
         Can only visit the 'small' nodes at most once.
     """
-    print(f"\n**** Part A; {file=}")
-    # depth first search
     graph = parse_input(file)
-    count = dfs(graph["start"], graph["end"], [])
-    print(f"{count=}")
+    count, _ = count_paths(graph)
+    return Result(count)
 
-def dfs_b(curr: Node, goal: Node, visited: List[Node], small: Node, paths: Set[str]) -> None:
-    """
-        Depth-first Search for Part B, find all unique paths from 'start' to 'end' nodes.
-        Will visit the 'small' node at most 2 times.
-
-        Does not return anything, modifies the 'paths' set. 
-    """
-    # Add the current path to the 'paths' set if we're at the goal. 
-    if curr == goal:
-        path_str = ",".join([x.name for x in visited] + [curr.name])
-        paths.add(path_str)
-        return
-    
-    if curr == small:
-        # allow the chosen 'small' value to be visited at most twice
-        if visited.count(curr) > 1:
-            return 
-    else: 
-        # don't revisit other small nodes
-        if not curr.big and curr in visited:
-            return
-
-    visited.append(curr)
-    for edge in curr.edges:
-        dfs_b(edge, goal, visited, small, paths)
-    visited.pop()
-
-def part_b(file: str) -> None:
+def part_b(file: str) -> Result:
     """
         Find the number of unique paths from start->end nodes in a graph.
         For each path, can visit ONE of the 'small' nodes at most twice.
     """
-    print(f"\n**** Part B; {file=}")
     graph = parse_input(file)
-
-    # get a list of all small caves
-    small_ones = list(filter(lambda x: not x.big and x.name not in ["start", "end"], graph.values()))
-    
-    # keep track of all unique paths
-    paths = set()
-
-    # repeat DFS for each small cave
-    for small_one in small_ones:
-       dfs_b(graph["start"], graph["end"], [], small_one, paths)
-    
-    print(f"count={len(paths)}")
+    _, count = count_paths(graph)
+    return Result(count)
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./test_2.txt")
-    part_a("./test_3.txt")
-    part_a("./input.txt")
-
-    part_b("./test_input.txt")
-    part_b("./test_2.txt")
-    part_b("./test_3.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./test_2.txt")
+    report(part_a, "./test_3.txt")
+    report(part_a, "./input.txt")
+
+    report(part_b, "./test_input.txt")
+    report(part_b, "./test_2.txt")
+    report(part_b, "./test_3.txt")
+    report(part_b, "./input.txt")
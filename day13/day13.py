@@ -4,8 +4,12 @@
 
 import numpy as np
 import numpy.typing as npt 
-from typing import List 
+from typing import List, Tuple
 from dataclasses import dataclass
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
 
 @dataclass 
@@ -19,9 +23,10 @@ class Fold:
 @dataclass
 class Board:
     """
-        Represent the input (graph and a list of folds)
+        Represent the input (dots, size of the paper and a list of folds)
     """
-    graph: npt.NDArray
+    dots: npt.NDArray # (N, 2) array of x, y
+    size: Tuple[int, int] # width, height
     folds: List[Fold]
 
 
@@ -32,8 +37,6 @@ def parse_input(file: str) -> Board:
     with open(file) as data:
         lines = data.read().splitlines()
 
-    # find max x and y values
-    max_x = max_y = 0
     points = []
     checking_folds = False
     folds: List[Fold] = []
@@ -43,86 +46,126 @@ def parse_input(file: str) -> Board:
             continue 
 
         if not checking_folds:
-            y,x = line.split(",")
-            max_x = max(int(x) + 1, max_x)
-            max_y = max(int(y) + 1, max_y)
+            x,y = line.split(",")
             points.append((int(x), int(y)))
         else:
             axis_data,idx = line.split("=")
             axis = axis_data[-1]
             folds.append(Fold(axis, int(idx)))
 
-    graph = np.zeros((max_x, max_y))
+    dots = np.array(points, dtype=np.int64).reshape(-1, 2)
+    size = (int(dots[:, 0].max()) + 1, int(dots[:, 1].max()) + 1) if len(dots) else (0, 0)
+    return Board(dots, size, folds)
 
-    # mark the points on the graph 
-    for x,y in points:
-        graph[x][y] = 1
-    
-    #print(f"{max_x=} {max_y=} {graph=} {folds=} {points=}")
-    return Board(graph, folds)
+def fold_column(fold: Fold, size: Tuple[int, int]) -> int:
+    """
+        Column of the dots array that a fold moves. Raises a ValueError if the part of the
+        paper past the fold line is longer than the part before it, as it would be reflected
+        past the edge of the paper (to negative coordinates).
+    """
+    col = 0 if fold.axis == "x" else 1
+    if size[col] - 1 - fold.index > fold.index:
+        raise ValueError(f"fold along {fold.axis}={fold.index} reflects past the edge of the paper ({size[col]} long)")
+    return col
 
-def do_fold(graph: npt.NDArray, fold:Fold) -> npt.NDArray:
+def do_fold(dots: npt.NDArray, size: Tuple[int, int], fold: Fold) -> Tuple[npt.NDArray, Tuple[int, int]]:
+    """
+        Perform the 'fold' on the dots and return the updated dots and paper size.
+
+        The dots past the fold line are reflected onto the other side (k - (coord - k)),
+        and the dots that end up on top of each other are merged. Only the dots are
+        stored, so memory doesn't depend on the size of the paper.
+        A dot on the fold line has nowhere to go, it raises a ValueError.
+    """
+    col = fold_column(fold, size)
+    k = fold.index
+    if (dots[:, col] == k).any():
+        raise ValueError(f"dot on the fold line {fold.axis}={k}")
+    folded = dots.copy()
+    folded[:, col] = np.where(dots[:, col] > k, 2 * k - dots[:, col], dots[:, col])
+    size = (k, size[1]) if col == 0 else (size[0], k)
+    return merge_dots(folded, size), size
+
+def merge_dots(dots: npt.NDArray, size: Tuple[int, int]) -> npt.NDArray:
     """
-        Perform the 'fold' on the graph and return the updated graph.
+        Merge the dots that are on top of each other, on a single int64 key per dot
+        (much faster than np.unique(axis=0)). The dots have to be inside the paper.
     """
-    if fold.axis == "y":
-        # horizontal split 
-        top = graph[0:fold.index]
-        bottom = graph[fold.index+1:]
+    stride = size[0] + 1
+    keys = np.unique(dots[:, 1] * stride + dots[:, 0])
+    return np.stack((keys % stride, keys // stride), axis=1)
 
-        # vertically flip the bottom piece and add it to the top
-        bottom_flipped = np.flip(bottom, 0)
-        combined = top + bottom_flipped
+ON_FOLD_LINE = -1
 
-        #print(f"{fold.index=} {top=} {bottom=} {bottom_flipped=} \n{combined=}")
-        graph = combined
-    else:
-        # vertical split 
-        left = graph[:, 0:fold.index]
-        right = graph[:, fold.index+1:]
+@dataclass
+class FoldProgram:
+    """
+        A list of folds compiled into one coordinate lookup array per axis:
+        a dot at (x, y) ends up at (x_map[x], y_map[y]) after all of the folds.
+        The coordinates that land on a fold line map to ON_FOLD_LINE.
+    """
+    x_map: npt.NDArray
+    y_map: npt.NDArray
+    size: Tuple[int, int] # width, height of the folded paper
 
-        # horizontally flip the right side and add it to the left
-        right_flipped = np.flip(right, 1)
-        combined = left + right_flipped
+def compile_folds(folds: List[Fold], size: Tuple[int, int]) -> FoldProgram:
+    """
+        Compose the folds into a lookup array per axis.
 
-        #print(f"{fold.index=} {left=} {right=} {right_flipped=} \n{combined=}")
-        graph=combined
+        A fold only moves the coordinate along its own axis, so the x and y folds are independent,
+        and the folds along one axis compose into a piecewise reflection of that coordinate.
+        It's evaluated once for every possible coordinate, instead of once per dot per fold.
+    """
+    maps = [np.arange(size[0], dtype=np.int64), np.arange(size[1], dtype=np.int64)]
+    final_size = list(size)
+    for fold in folds:
+        col = fold_column(fold, (final_size[0], final_size[1]))
+        k = fold.index
+        maps[col] = np.where(maps[col] == k, ON_FOLD_LINE, np.where(maps[col] > k, 2 * k - maps[col], maps[col]))
+        final_size[col] = k
+
+    for m, length in zip(maps, final_size):
+        if ((m < ON_FOLD_LINE) | (m >= length)).any():
+            raise ValueError(f"folds map coordinates outside of the {final_size[0]}x{final_size[1]} paper")
+    return FoldProgram(maps[0], maps[1], (final_size[0], final_size[1]))
+
+def apply_folds(program: FoldProgram, dots: npt.NDArray) -> npt.NDArray:
+    """
+        Move a whole set of dots to their final positions with the compiled folds, and merge the duplicates.
+    """
+    folded = np.stack((program.x_map[dots[:, 0]], program.y_map[dots[:, 1]]), axis=1)
+    if (folded == ON_FOLD_LINE).any():
+        raise ValueError("dot on a fold line")
+    return merge_dots(folded, program.size)
 
-    return graph 
+def render(dots: npt.NDArray, size: Tuple[int, int]) -> str:
+    """
+        Draw the dots on the paper, it will return ASCII art capital letters
+    """
+    width, height = size
+    graph = np.zeros((height, width), dtype=bool)
+    graph[dots[:, 1], dots[:, 0]] = True
+    return "\n".join([" ".join(["#" if x else " " for x in row]) for row in graph])
 
-def part_a(file: str) -> None:
-    print(f"\n**** Part A; {file=}")
+def part_a(file: str) -> Result:
     board = parse_input(file)
 
     # How many dots are visible after completing just the first fold instruction on your transparent paper?
-    first_fold = board.folds[0]
-    graph_after_fold = do_fold(board.graph, first_fold)
-
-    # count total num of visible 'dots' in graph.
-    dot_count = 0
-    for num in np.nditer(graph_after_fold):
-        if num > 0:
-            dot_count += 1
+    dots, _ = do_fold(board.dots, board.size, board.folds[0])
 
-    print(f"{dot_count=}")
+    return Result(len(dots))
 
-def part_b(file: str) -> None:
-    print(f"\n**** Part B; {file=}")
+def part_b(file: str) -> Result:
     board = parse_input(file)
-    graph = board.graph.copy()
-
-    # Do all of the required folds
-    for fold in board.folds:
-        #print(f"{len(graph)=} {len(graph[0])=}")
-        #print(f"{fold=}")
-        graph = do_fold(graph, fold)
-        
-    # print out the graph, it will return ASCII art capital letters
-    for row in graph:
-        print(" ".join(["#" if x > 0 else " " for x in row]))
+
+    # Do all of the required folds at once
+    program = compile_folds(board.folds, board.size)
+    dots = apply_folds(program, board.dots)
+
+    return Result(render(dots, program.size))
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt") # 622
-    part_b("./test_input.txt")
-    part_b("./input.txt") # HKUJGAJZ
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt") # 622
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt") # HKUJGAJZ
@@ -3,8 +3,13 @@
 # https://adventofcode.com/2021/day/14
 
 from dataclasses import dataclass 
-from typing import Dict, List
-from collections import Counter
+from typing import Dict, Iterable, List
+import numpy as np
+import numpy.typing as npt
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
 @dataclass
 class Formula:
@@ -27,100 +32,170 @@ def parse_input(file: str) -> Formula:
 
     return Formula(polymer, rules)
 
-def do_insertion(formula: Formula) -> Formula:
+class Polymerizer:
     """
-        O(N) algorithm that iterates through the polymer string and performs insertions where possible.
-    """
-    polymer = formula.polymer.copy()
-    out = []
-    for i in range(0, len(polymer)-1):
-        pair = polymer[i] + polymer[i+1]
-        insert = formula.rules.get(pair)
-        out.append(polymer[i])
-        if insert is not None:
-            out.append(insert)
-
-    out.append(polymer[-1])
-    #print(f"res={''.join(out)}")
-    formula.polymer = out
-    
+        Pair insertion engine. Elements are interned to integer ids, and the pair of elements
+        (a, b) gets the id a * E + b (E = number of elements).
 
-def part_a(file: str) -> None:
-    """
-        Perform polymer insertion using a List. 
-        Determine the most and least frequent letter in the resulting chain after 10 steps.
-    """
-    print(f"\n**** Part A; {file=}")
-    formula = parse_input(file)
+        A polymer is tracked as a dense vector with the count of each pair. Python int (object)
+        counts are used so they never overflow, no matter how many steps.
 
-    for _ in range(10):
-        do_insertion(formula)
- 
-    ordered = Counter(formula.polymer).most_common()
+        A step is a linear map on that vector: a pair AB with the rule AB -> R turns into AR and RB,
+        and a pair without a rule stays as it is. It's stored sparsely, as the two pairs each pair
+        turns into, or as the full transition matrix for exponentiation by squaring.
+    """
+    def __init__(self, rules: Dict[str, str], elements: Iterable[str] = ()):
+        names = set(elements)
+        for pair, insert in rules.items():
+            names.update(pair)
+            names.add(insert)
+        self.elements = sorted(names)
+        self.ids = {e: i for i, e in enumerate(self.elements)}
+        count = len(self.elements)
+        self.pairs = count * count
+
+        # pair -> the two pairs it turns into after a step (a pair without a rule turns into itself only)
+        self.left = np.arange(self.pairs)
+        self.right = np.full(self.pairs, -1)
+        for pair, insert in rules.items():
+            a, b, r = self.ids[pair[0]], self.ids[pair[1]], self.ids[insert]
+            self.left[self.pair_id(a, b)] = self.pair_id(a, r)
+            self.right[self.pair_id(a, b)] = self.pair_id(r, b)
+        self.has_rule = self.right >= 0
+
+        # pair -> its first element, to count the elements
+        self.first = np.arange(self.pairs) // count
+
+    def pair_id(self, a: int, b: int) -> int:
+        return a * len(self.elements) + b
+
+    def pair_counts(self, polymer: Iterable[str]) -> npt.NDArray:
+        counts = np.zeros(self.pairs, dtype=object)
+        counts[:] = 0
+        ids = [self.ids[c] for c in polymer]
+        for a, b in zip(ids, ids[1:]):
+            counts[self.pair_id(a, b)] += 1
+        return counts
+
+    def step(self, counts: npt.NDArray) -> npt.NDArray:
+        """
+            Apply one step of insertions to the pair counts
+        """
+        out = np.zeros(self.pairs, dtype=object)
+        out[:] = 0
+        np.add.at(out, self.left, counts)
+        np.add.at(out, self.right[self.has_rule], counts[self.has_rule])
+        return out
+
+    def transition_matrix(self) -> npt.NDArray:
+        """
+            Matrix M for one step, so that next = M @ counts
+        """
+        m = np.zeros((self.pairs, self.pairs), dtype=object)
+        m[:] = 0
+        for pair in range(self.pairs):
+            m[self.left[pair], pair] += 1
+            if self.has_rule[pair]:
+                m[self.right[pair], pair] += 1
+        return m
+
+    def matrix_power(self, steps: int) -> npt.NDArray:
+        """
+            M^steps by exponentiation by squaring, O(log steps) matrix multiplications
+        """
+        result = np.identity(self.pairs, dtype=object)
+        base = self.transition_matrix()
+        while steps:
+            if steps & 1:
+                result = result.dot(base)
+            steps >>= 1
+            if steps:
+                base = base.dot(base)
+        return result
+
+    def pair_growth(self, steps: int) -> npt.NDArray:
+        """
+            E x P matrix with the count of element e (as the first of a pair) that one pair p grows
+            into after a number of steps, i.e. the pair -> first element map times M^steps.
+
+            It's built by applying the transposed step to the E rows, one step at a time. With the
+            counts growing as 2^steps, that's much cheaper than squaring the full P x P matrix of
+            big integers (matrix_power) for any realistic number of steps.
+        """
+        growth = np.zeros((len(self.elements), self.pairs), dtype=object)
+        growth[:] = 0
+        growth[self.first, np.arange(self.pairs)] = 1
+        for _ in range(steps):
+            after = growth[:, self.left]
+            after[:, self.has_rule] += growth[:, self.right[self.has_rule]]
+            growth = after
+        return growth
+
+    def element_counts(self, polymer: List[str], counts: npt.NDArray) -> Dict[str, int]:
+        """
+            Count each element from the pair counts. Every element is the first of a pair,
+            except for the last element of the polymer (which never changes).
+        """
+        totals = np.zeros(len(self.elements), dtype=object)
+        totals[:] = 0
+        np.add.at(totals, self.first, counts)
+        totals[self.ids[polymer[-1]]] += 1
+        return self.named(totals)
+
+    def named(self, totals: npt.NDArray) -> Dict[str, int]:
+        return {e: int(totals[i]) for i, e in enumerate(self.elements) if totals[i]}
+
+    def run(self, polymer: List[str], steps: int) -> Dict[str, int]:
+        """
+            Element counts after a number of steps, one sparse step at a time
+        """
+        counts = self.pair_counts(polymer)
+        for _ in range(steps):
+            counts = self.step(counts)
+        return self.element_counts(polymer, counts)
+
+    def run_batch(self, polymers: List[List[str]], steps: int) -> List[Dict[str, int]]:
+        """
+            Element counts after a number of steps for many polymers. The counts that a single pair
+            grows into are computed once, so each polymer is just a sum over its own pairs.
+        """
+        per_pair = self.pair_growth(steps)
+        results = []
+        for polymer in polymers:
+            ids = [self.ids[c] for c in polymer]
+            totals = per_pair[:, [self.pair_id(a, b) for a, b in zip(ids, ids[1:])]].sum(axis=1)
+            totals[ids[-1]] += 1
+            results.append(self.named(totals))
+        return results
+
+def most_least_common(element_counts: Dict[str, int]) -> Result:
+    ordered = sorted(element_counts.items(), key=lambda x: x[1], reverse=True)
     most_common = ordered[0]
     least_common = ordered[-1]
-
     result = most_common[1] - least_common[1]
+    return Result(result, {"most_common": most_common, "least_common": least_common})
 
-    print(f"{most_common=} {least_common=} {result=}")
+def part_a(file: str) -> Result:
+    """
+        Determine the most and least frequent letter in the resulting chain after 10 steps.
+    """
+    formula = parse_input(file)
+    engine = Polymerizer(formula.rules, formula.polymer)
+    return most_least_common(engine.run(formula.polymer, 10))
 
 
-def part_b(file: str) -> None:
+def part_b(file: str) -> Result:
     """
         Determine the most and least frequent letter in the resulting chain after 40 steps.
-        Instead of using a List, it will count the frequency of pairs of letters during each step.
+        Instead of building the chain, it counts the pairs of letters during each step.
     """
-    print(f"\n**** Part B; {file=}")
     formula = parse_input(file)
-
-    # Keep track of the number of times that pairs of characters appear
-    # If we know the number of times each pair appears at each step, we can determine how many
-    # 'inserted' pairs will be added during each step.
-    pair_counter = Counter() 
-
-    # Populate pair_counter with initial polymer
-    polymer = formula.polymer
-    for i in range(len(polymer) - 1):
-        pair = polymer[i] + polymer[i+1]
-        pair_counter[pair] += 1
-    # print(f"{pair_counter=}")
-
-
-    for _ in range(40):
-        # Create a new Counter object that will replace the current pair_counter
-        pair_counter_tmp = Counter() 
-        for pair in pair_counter: 
-            # e.g. AB is the pair, AB->R is the rule 
-
-            # first character + rule, e.g. this would be 'AR'
-            # Every time the current 'pair' is counted, it will create this new pair (i.e. += pair_counter[pair])
-            pair_counter_tmp[pair[0] + formula.rules[pair]] += pair_counter[pair]
-
-            # rule + second character, e.g. this would be 'RB'
-            # Every time the current 'pair' is counted, it will create this new pair (i.e. += pair_counter[pair])
-            pair_counter_tmp[formula.rules[pair] + pair[1]] += pair_counter[pair]
-        
-        # replace the current pair_counter with the tmp pair_counter
-        pair_counter = pair_counter_tmp
-
-    # Count the number of times each character appears
-    char_counter = Counter() 
-    for pair in pair_counter: 
-        char_counter[pair[0]] += pair_counter[pair]
-    
-    # The last character in the original polymer string is never counted in the above loop,
-    #  so add one to this character's count
-    char_counter[polymer[-1]] += 1 
-
-    ordered = char_counter.most_common()
-    most_common = ordered[0]
-    least_common = ordered[-1]
-    result = most_common[1] - least_common[1]
-    print(f"{most_common=} {least_common=} {result=}")
+    engine = Polymerizer(formula.rules, formula.polymer)
+    return most_least_common(engine.run(formula.polymer, 40))
 
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 # Advent of Code 2021 - Day 15
 # https://adventofcode.com/2021/day/15
-import sys 
-from typing import List,Tuple,Dict
-from queue import PriorityQueue
-import math
+from typing import List,Tuple,Sequence
+from heapq import heappush, heappop
+from dataclasses import dataclass
+from array import array
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
+
+# risk levels are a single digit 1-9
+MAX_RISK = 9
 
 def parse_input(file: str) -> List[List[int]]:
     """
@@ -22,175 +29,210 @@ def print_graph(graph: List[List[int]]) -> None:
     for row in graph: 
        print("".join([str(x) for x in row]))
 
-def get_neighbors(graph: List[List[int]], curr_node: Tuple[int,int]) -> List[Tuple[int,int]]:
+
+def flatten(graph: List[List[int]]) -> Tuple[array, int]:
     """
-        Helper function to return valid neighbors of any point in a graph.
-        Does bounds checking.
+        Helper method that flattens a 2d graph into a row-major array of risk levels.
+        Returns the array and the width of a row; node (row, col) is at index row * width + col.
     """
-    curr_row,curr_col = curr_node
+    return array("B", [c for row in graph for c in row]), len(graph[0])
 
+def get_neighbors(node: int, width: int, height: int) -> List[int]:
+    """
+        Helper function to return the valid neighbors of a node in a flat row-major grid.
+        Does bounds checking.
+    """
+    row, col = divmod(node, width)
     neighbors = []
-    
-    if curr_row-1 >= 0:
-        neighbors.append((curr_row-1, curr_col))
-
-    if curr_row+1 < len(graph):
-        neighbors.append((curr_row+1, curr_col))
-
-    if curr_col-1 >= 0:
-        neighbors.append((curr_row, curr_col-1))
-
-    if curr_col+1 < len(graph[0]):
-        neighbors.append((curr_row, curr_col+1))
-
+    if row > 0:
+        neighbors.append(node - width)
+    if row < height - 1:
+        neighbors.append(node + width)
+    if col > 0:
+        neighbors.append(node - 1)
+    if col < width - 1:
+        neighbors.append(node + 1)
     return neighbors
 
-def dijkstra(graph, start_node):
+def unreached(size: int) -> array:
     """
-        Dijkstra's shortest path algorithm. Used for Part A but way too slow for part B. 
+        Per-node lowest cost found so far for the searches, -1 if not reached yet.
+        A compact array of C ints (4 bytes per node) rather than a list of boxed Python ints,
+        it's the only thing the searches allocate for every node of the grid.
     """
-    # nodes represented by tuple(row,col)
-    unvisited_nodes = [] #[[(row,col) for col in row] for row in graph]
-    for i in range(len(graph)) :
-        for j in range(len(graph[i])):
-            unvisited_nodes.append((i,j))
-
-    shortest_path = {}
-    previous_nodes = {}
-
-    max_value = sys.maxsize
-    for node in unvisited_nodes:
-        shortest_path[node] = max_value
-    
-    shortest_path[start_node] = 0
-
-    while unvisited_nodes:
-        current_min_node = None 
-        for node in unvisited_nodes:
-            if current_min_node == None:
-                current_min_node = node 
-            elif shortest_path[node] < shortest_path[current_min_node]:
-                current_min_node = node 
-        
-        neighbors = get_neighbors(graph, current_min_node)
-        for neighbor in neighbors:
-            # how expensive would it be to go to this neighbor 
-            tmp = shortest_path[current_min_node] + graph[neighbor[0]][neighbor[1]]
-            if tmp < shortest_path[neighbor]:
-                shortest_path[neighbor] = tmp 
-                previous_nodes[neighbor] = current_min_node
-        
-        unvisited_nodes.remove(current_min_node)
-
-    return previous_nodes, shortest_path
+    return array("i", [-1]) * size
 
-def heuristic(position: Tuple[int,int], goal: Tuple[int,int]) :
+@dataclass
+class SearchStats:
     """
-        Heuristic function for A-star algorithm. 
-        Will return the straight line distance between the current point and the end point.
+        Counters for a shortest path search, to compare how much work each search does.
     """
-    x1,y1 = position 
-    x2,y2 = goal
-    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    expanded: int = 0 # nodes popped from the queue and expanded
+    pushed: int = 0 # entries added to the queue
+    stale: int = 0 # outdated queue entries skipped when popped
 
-def astar(graph: List[List[int]], start: Tuple[int,int], goal: Tuple[int,int]) -> Tuple[Dict[int, int], Dict[int,int]]:
+def shortest_path(costs: Sequence[int], width: int, start: int, goal: int, use_heuristic: bool = True) -> Tuple[int, SearchStats]:
     """
-        A-star path finding algorithm. Determine the shortest path between two points with a
-        heuristic function.
+        A-star path finding over a flat row-major grid, using a heapq binary heap as the priority queue.
+        Returns the lowest total risk from start to goal (not counting start) and the search counters.
 
-        shout out to https://www.redblobgames.com/pathfinding/a-star/implementation.html
-    """
+        The heuristic is the manhattan distance to the goal. Every step costs at least 1, so it never
+        overestimates and the first time the goal is popped its cost is final.
+        Without the heuristic this is plain Dijkstra.
 
-    # Use priority queue to explore the 'most promising' nodes first. 
-    frontier = PriorityQueue()
+        heapq has no decrease-key, so a node is pushed again whenever a cheaper cost to it is found
+        and the outdated entries are skipped when they get popped.
 
-    # Keep track of where the shortest path comes from at each point
-    path = {}
+        Ties on the priority go to the node with the highest cost so far (the closest to the goal),
+        otherwise A* expands the ties in Dijkstra order and ends up exploring just as many nodes.
 
-    # Keep track of the current lowest cost to get to each point.
-    cost = {}
+        shout out to https://www.redblobgames.com/pathfinding/a-star/implementation.html
+    """
+    height = len(costs) // width
+    goal_row, goal_col = divmod(goal, width)
 
-    frontier.put(start, 0)
-    path[start] = None 
+    cost = unreached(len(costs))
     cost[start] = 0
 
-    while not frontier.empty():
-        curr = frontier.get()
+    stats = SearchStats(pushed=1)
+    # (priority, -cost, node), negated so the highest cost pops first among equal priorities
+    frontier = [(0, 0, start)]
 
+    while frontier:
+        _, neg_cost, curr = heappop(frontier)
+        curr_cost = -neg_cost
+        if curr_cost > cost[curr]:
+            stats.stale += 1
+            continue
         if curr == goal:
-            break
-        
-        for next in get_neighbors(graph, curr):
-            new_cost = cost[curr] + graph[next[0]][next[1]]
-            if next not in cost or new_cost < cost[next]:
-                cost[next] = new_cost 
-                priority = new_cost + heuristic(next, goal)
-                frontier.put(next, priority)
-                path[next] = curr
-    return path, cost
-
-def expand_graph(graph: List[List[int]]) -> List[List[int]]: 
-    """
-        Helper method for Part B that expands the input graph by 5x.
-    """
-    output = [[0 for _ in range(len(graph[0]) * 5)] for _ in range(len(graph) * 5)]    
+            return curr_cost, stats
+        stats.expanded += 1
 
-    row_offset = len(graph)
-    col_offset = len(graph[0])
+        for next in get_neighbors(curr, width, height):
+            new_cost = curr_cost + costs[next]
+            if cost[next] == -1 or new_cost < cost[next]:
+                cost[next] = new_cost
+                priority = new_cost
+                if use_heuristic:
+                    next_row, next_col = divmod(next, width)
+                    priority += abs(goal_row - next_row) + abs(goal_col - next_col)
+                heappush(frontier, (priority, -new_cost, next))
+                stats.pushed += 1
 
-    # copy the rows down first
-    for i, row in enumerate(graph):
-        for j,col in enumerate(row):
-            cost = int(col)
-            output[i][j] = cost 
-            for x in range(0, 5):
-                output[i + (row_offset * x)][j] = cost
-                cost = cost + 1 if cost < 9 else 1
+    raise ValueError(f"no path from {start} to {goal}")
 
-    # then copy the columns over
-    for i,row in enumerate(output):
-        for j in range(col_offset, len(output[i])):
-            prev_value = row[j-col_offset]
-            row[j] = prev_value + 1 if prev_value < 9 else 1
-
-    return output 
+def dial(costs: Sequence[int], width: int, start: int, goal: int) -> Tuple[int, SearchStats]:
+    """
+        Dijkstra's algorithm with a bucket queue (Dial's algorithm), same arguments and return as shortest_path.
 
+        Every step costs between 1 and MAX_RISK, so all of the nodes in the frontier are within MAX_RISK
+        of the current cost. MAX_RISK + 1 buckets indexed by cost % (MAX_RISK + 1), reused in a circle,
+        are enough to always find the next cheapest node in O(1) instead of O(log N).
+    """
+    height = len(costs) // width
+    num_buckets = MAX_RISK + 1
 
+    cost = unreached(len(costs))
+    cost[start] = 0
 
-def part_a(file: str) -> None:
+    stats = SearchStats(pushed=1)
+    buckets: List[List[int]] = [[] for _ in range(num_buckets)]
+    buckets[0].append(start)
+    queued = 1
+
+    curr_cost = 0
+    while queued:
+        # steps cost at least 1, so nothing gets added to the bucket being emptied
+        bucket = buckets[curr_cost % num_buckets]
+        while bucket:
+            curr = bucket.pop()
+            queued -= 1
+            if cost[curr] != curr_cost:
+                # a cheaper path was found after this entry was added
+                stats.stale += 1
+                continue
+            if curr == goal:
+                return curr_cost, stats
+            stats.expanded += 1
+
+            for next in get_neighbors(curr, width, height):
+                new_cost = curr_cost + costs[next]
+                if cost[next] == -1 or new_cost < cost[next]:
+                    cost[next] = new_cost
+                    buckets[new_cost % num_buckets].append(next)
+                    queued += 1
+                    stats.pushed += 1
+        curr_cost += 1
+
+    raise ValueError(f"no path from {start} to {goal}")
+
+class TiledGrid:
+    """
+        Virtual view of the cave for Part B: the base grid repeated `factor` times in each direction,
+        with the risk going up by one (wrapping 9 back to 1) for every tile right or down.
+
+        Risk levels are computed on demand when indexed, so the expanded grid is never allocated.
+        Indexed like the flat row-major array from flatten() and can be passed to the searches as-is.
+
+        The divisions are precomputed once per row and per column of the expanded grid (O(width + height)
+        memory), as the searches index the grid a few times per node.
+    """
+    def __init__(self, base: Sequence[int], base_width: int, factor: int):
+        self.base = base
+        self.base_width = base_width
+        self.base_height = len(base) // base_width
+        self.factor = factor
+        self.width = base_width * factor
+        self.height = self.base_height * factor
+
+        # expanded row -> start of its base row in base, and its tile row
+        self.row_start = [(row % self.base_height) * base_width for row in range(self.height)]
+        self.row_tile = [row // self.base_height for row in range(self.height)]
+        # expanded col -> base col, and its tile col
+        self.col_base = [col % base_width for col in range(self.width)]
+        self.col_tile = [col // base_width for col in range(self.width)]
+        # base risk + tile row + tile col -> risk, wrapping 9 back to 1
+        self.wrap = [(risk - 1) % MAX_RISK + 1 for risk in range(MAX_RISK + 2 * factor)]
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    def __getitem__(self, idx: int) -> int:
+        row, col = divmod(idx, self.width)
+        base_risk = self.base[self.row_start[row] + self.col_base[col]]
+        return self.wrap[base_risk + self.row_tile[row] + self.col_tile[col]]
+
+def part_a(file: str) -> Result:
     """
         Pathfinding a limited size graph.
-        Used Dijkstra's algorithm to path find. This ended up being pretty slow. 
+        Uses Dijkstra's algorithm with a bucket queue (Dial's algorithm).
     """
-    print(f"\n**** Part A; {file=}")
-    data = parse_input(file)
-
-    # rows, cols
-    end_node = ((len(data)-1, len(data[0])-1))
+    costs, width = flatten(parse_input(file))
 
-    _, shortest_paths = dijkstra(data, (0, 0))
-    shortest_path_to_end_node = shortest_paths[end_node]
+    end_node = len(costs) - 1
+    shortest_path_to_end_node, stats = dial(costs, width, 0, end_node)
 
-    print(f"{end_node=} {shortest_path_to_end_node=}")
+    return Result(shortest_path_to_end_node, {"end_node": divmod(end_node, width), "expanded": stats.expanded})
 
 
-def part_b(file: str) -> None:
+def part_b(file: str, factor: int = 5) -> Result:
     """
-        Part B involved multiplying the size of the graph by 5, so Dijkstra's algo
-        would not be feasible. Implemented A* algo to speed up the search.
+        Part B involved multiplying the size of the graph by 5 (or any other factor), uses Dial's algorithm
+        like part A. The tiled graph is computed on the fly instead of being expanded up front.
+
+        The A* heuristic doesn't pay off here: the manhattan distance is a weak bound when the risk
+        averages ~5 per step, and the search expands nearly every node anyway.
     """
-    print(f"\n**** Part B; {file=}")
-    graph = expand_graph(parse_input(file))
+    grid = TiledGrid(*flatten(parse_input(file)), factor)
 
-    end_node = ((len(graph)-1, len(graph[0])-1))
-    _, cost = astar(graph, (0, 0), end_node)
-    cost_to_end_node = cost[end_node]
+    end_node = len(grid) - 1
+    cost_to_end_node, stats = dial(grid, grid.width, 0, end_node)
 
-    print(f"{end_node=} {cost_to_end_node=}")
+    return Result(cost_to_end_node, {"end_node": divmod(end_node, grid.width), "expanded": stats.expanded})
 
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    part_a("./input.txt")
-    part_b("./test_input.txt")
-    part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    report(part_a, "./input.txt")
+    report(part_b, "./test_input.txt")
+    report(part_b, "./input.txt")
\ No newline at end of file
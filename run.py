@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# Advent of Code 2021 - Solver runner
+#
+# Discovers every dayNN/dayN.py module, runs part_a/part_b against an input file
+# and reports the wall time, peak memory and result of each part.
+#
+#   ./run.py                          # all days, ./dayNN/input.txt, JSON to stdout
+#   ./run.py -d 5 -d 15 -f csv        # only days 5 and 15, CSV output
+#   ./run.py -i test_input.txt -o report.json
+
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict, fields
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aoc import Result
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PARTS = ["part_a", "part_b"]
+
+
+@dataclass
+class Measurement:
+    """
+        Timing/memory/result record for a single part of a single day.
+    """
+    day: int
+    part: str
+    input: str
+    status: str # ok, error or missing
+    result: Any = None
+    details: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    time_s: Optional[float] = None
+    peak_mem_bytes: Optional[int] = None
+
+
+def discover_days() -> List[int]:
+    """
+        Return the sorted list of day numbers that have a dayNN/dayN.py solver.
+    """
+    days = []
+    for entry in os.listdir(ROOT):
+        match = re.fullmatch(r"day(\d\d)", entry)
+        if match and os.path.isfile(solver_path(int(match.group(1)))):
+            days.append(int(match.group(1)))
+    return sorted(days)
+
+
+def solver_path(day: int) -> str:
+    return os.path.join(ROOT, f"day{day:02}", f"day{day}.py")
+
+
+def load_day(day: int) -> ModuleType:
+    """
+        Import the solver module for a day from its file path.
+    """
+    # named after its path from the repo root (dayNN/dayN.py -> dayNN.dayN) and registered in sys.modules,
+    # so functions of the module pickle under a name the map_chunks worker processes can import as well
+    # (with the spawn/forkserver start methods they import it again, with the repo root on their sys.path)
+    spec = importlib.util.spec_from_file_location(f"day{day:02}.day{day}", solver_path(day))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def to_serializable(value: Any) -> Any:
+    """
+        Convert a solver return value into something json/csv can represent.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_serializable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): to_serializable(v) for k, v in value.items()}
+    return repr(value)
+
+
+def time_part(func: Callable[[str], Any], file: str, repeat: int) -> Tuple[float, Any]:
+    """
+        Run func(file) `repeat` times and return the best wall time and the last result.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(file)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func: Callable[[str], Any], file: str) -> int:
+    """
+        Run func(file) once under tracemalloc and return the peak allocation in bytes.
+        Done as a separate run since tracing slows down the allocations considerably.
+    """
+    tracemalloc.start()
+    try:
+        func(file)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_part(day: int, module: ModuleType, part: str, file: str, repeat: int, memory: bool, verbose: bool) -> Measurement:
+    func = getattr(module, part, None)
+    if func is None:
+        return Measurement(day, part, file, "missing")
+
+    # solvers chatter on stdout, keep it out of the report unless asked for
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with out:
+            elapsed, result = time_part(func, file, repeat)
+            peak = peak_memory(func, file) if memory else None
+    except Exception as e:
+        return Measurement(day, part, file, "error", error=f"{type(e).__name__}: {e}")
+
+    if isinstance(result, Result):
+        return Measurement(day, part, file, "ok", to_serializable(result.answer), to_serializable(result.details), None, elapsed, peak)
+    return Measurement(day, part, file, "ok", to_serializable(result), None, None, elapsed, peak)
+
+
+def run(days: List[int], input_name: str, repeat: int, memory: bool, verbose: bool) -> List[Measurement]:
+    measurements = []
+    for day in days:
+        file = os.path.join(ROOT, f"day{day:02}", input_name)
+        try:
+            module = load_day(day)
+        except Exception as e:
+            for part in PARTS:
+                measurements.append(Measurement(day, part, file, "error", error=f"{type(e).__name__}: {e}"))
+            continue
+
+        for part in PARTS:
+            m = run_part(day, module, part, file, repeat, memory, verbose)
+            print(f"day{day:02} {part}: {m.status} time={m.time_s} peak={m.peak_mem_bytes} result={m.result}", file=sys.stderr)
+            measurements.append(m)
+    return measurements
+
+
+def write_report(measurements: List[Measurement], fmt: str, out) -> None:
+    if fmt == "json":
+        json.dump([asdict(m) for m in measurements], out, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=[f.name for f in fields(Measurement)])
+        writer.writeheader()
+        for m in measurements:
+            row = asdict(m)
+            for key in ["result", "details"]:
+                if not isinstance(row[key], (type(None), int, float, str)):
+                    row[key] = json.dumps(row[key])
+            writer.writerow(row)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run and time the Advent of Code 2021 solvers.")
+    parser.add_argument("-d", "--day", type=int, action="append", help="day to run (repeatable, default: all)")
+    parser.add_argument("-i", "--input", default="input.txt", help="input file name inside each dayNN directory")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json")
+    parser.add_argument("-o", "--output", help="write the report to a file instead of stdout")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="timing runs per part, best time is reported")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the solvers' own output")
+    args = parser.parse_args(argv)
+
+    available = discover_days()
+    days = sorted(args.day) if args.day else available
+    unknown = [d for d in days if d not in available]
+    if unknown:
+        parser.error(f"no solver for day(s) {unknown}")
+
+    measurements = run(days, args.input, max(args.repeat, 1), not args.no_memory, args.verbose)
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_report(measurements, args.format, out)
+    else:
+        write_report(measurements, args.format, sys.stdout)
+
+    return 0 if all(m.status == "ok" for m in measurements) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,10 @@
 # Template
 # Advent of Code 2021 - Day N
 # https://adventofcode.com/2021/day/<N>
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aoc import Result, report
 
 def parse_input(file: str) -> None:
     """
@@ -12,16 +16,16 @@ def parse_input(file: str) -> None:
         #lines = data.read().splitlines()
         pass
 
-def part_a(file: str) -> None:
-    print(f"\n**** Part A; {file=}")
+def part_a(file: str) -> Result:
     data = parse_input(file)
+    return Result(None)
 
-def part_b(file: str) -> None:
-    print(f"\n**** Part B; {file=}")
+def part_b(file: str) -> Result:
     data = parse_input(file)
+    return Result(None)
 
 if __name__ == "__main__":
-    part_a("./test_input.txt")
-    #part_a("./input.txt")
-    #part_b("./test_input.txt")
-    #part_b("./input.txt")
\ No newline at end of file
+    report(part_a, "./test_input.txt")
+    #report(part_a, "./input.txt")
+    #report(part_b, "./test_input.txt")
+    #report(part_b, "./input.txt")